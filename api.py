@@ -0,0 +1,228 @@
+"""HTTP prediction service (ASGI) next to the Streamlit app.
+
+Scores with the same models, calibration, thresholds and insight rules as
+the app (scoring.py, insight_rules.py), through a shared InferenceService so
+repeated inputs hit the prediction cache:
+
+    POST /predict/diabetes      {"values": [6, 148, 72, 35, 0, 33.6, 0.627, 50]}
+    POST /predict/heart         {"features": {"age": 63, "sex": 1, ...}}
+    POST /predict/parkinsons    ...
+    POST /predict/batch         {"disease": "heart", "rows": [[...], {...}, ...]}
+    GET  /health
+
+Rows are either a list in model feature order or an object keyed by feature
+name. `?language=Hindi` translates the diagnosis and insights. A single
+prediction also returns the population percentile of every input
+(percentiles.py, null for coded categories) and, with a `"user_id"`, is
+recorded in the prediction history (history_store.py) like predictions made
+in the app. Request parsing and scoring run on a bounded thread pool
+(HEALTH_API_THREADS), so the event loop only moves bytes; beyond
+HEALTH_API_MAX_PENDING queued requests the service answers 503 instead of
+building an unbounded backlog.
+
+    python api.py --port 8000 --workers 4
+"""
+import argparse
+import json
+import math
+import os
+import traceback
+from contextlib import asynccontextmanager
+
+import anyio
+import anyio.to_thread
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import history_store
+import i18n
+import inference_service
+import insight_rules
+import percentiles
+import reports
+import scoring
+
+API_THREADS = int(os.environ.get('HEALTH_API_THREADS', '8'))
+MAX_PENDING = int(os.environ.get('HEALTH_API_MAX_PENDING', '1000'))
+MAX_BATCH_ROWS = int(os.environ.get('HEALTH_API_MAX_BATCH', '10000'))
+
+_service = None
+
+
+def service():
+    global _service
+    if _service is None:
+        _service = inference_service.InferenceService()
+    return _service
+
+
+class RequestError(ValueError):
+    """A client error, answered with `status` and a JSON `{"error": ...}` body."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+# ------------------------------------------------
+# 🩺 Scoring (runs on the worker threads)
+# ------------------------------------------------
+def _translators(language):
+    if language not in i18n.LANGUAGES:
+        raise RequestError(f"Unknown language {language!r}, expected one of {list(i18n.LANGUAGES)}")
+    return i18n.translator(language), i18n.translator(language, 'insights')
+
+
+def parse_row(disease, row):
+    """Input values in model feature order from a list or a {feature: value} object."""
+    features = scoring.get_spec(disease)['features']
+    if isinstance(row, dict):
+        missing = [name for name in features if name not in row]
+        if missing:
+            raise RequestError(f"Missing features for {disease}: {missing}")
+        row = [row[name] for name in features]
+    if not isinstance(row, list) or len(row) != len(features):
+        raise RequestError(f"Expected {len(features)} values for {disease} in the order {features}")
+    try:
+        values = [float(v) for v in row]
+    except (TypeError, ValueError):
+        raise RequestError("Values must be numbers") from None
+    if not all(math.isfinite(v) for v in values):
+        raise RequestError("Values must be finite numbers")
+    return values
+
+
+def _load_body(body):
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise RequestError("Request body must be JSON") from None
+    if not isinstance(payload, dict):
+        raise RequestError("Request body must be a JSON object")
+    return payload
+
+
+def predict(disease, body, language):
+    t, t_insight = _translators(language)
+    payload = _load_body(body)
+    row = payload['features'] if 'features' in payload else payload.get('values')
+    values = parse_row(disease, row)
+    result = service().predict(disease, values)
+    if payload.get('user_id') is not None:
+        history_store.store().record(payload['user_id'], disease, values, result)
+    spec = scoring.get_spec(disease)
+    return dict(
+        result,
+        disease=disease,
+        diagnosis=reports.diagnosis_text(spec['label'], result['probability'], result['high_risk'], t),
+        insights=insight_rules.health_insights(disease, values, result['insight_flag'], t=t_insight),
+        percentiles=dict(zip(spec['features'], percentiles.lookup(disease, values))),
+    )
+
+
+def predict_batch(body, language):
+    t, t_insight = _translators(language)
+    payload = _load_body(body)
+    disease = payload.get('disease')
+    if disease not in scoring.DISEASES:
+        raise RequestError(f"Unknown disease {disease!r}, expected one of {sorted(scoring.DISEASES)}")
+    rows = payload.get('rows')
+    if not isinstance(rows, list) or not rows:
+        raise RequestError("'rows' must be a non-empty list")
+    if len(rows) > MAX_BATCH_ROWS:
+        raise RequestError(f"At most {MAX_BATCH_ROWS} rows per batch", status=413)
+    matrix = [parse_row(disease, row) for row in rows]
+    model, artifact = scoring.load_entry(disease)
+    scores = scoring.score(disease, matrix, model=model, model_sha256=artifact.manifest['sha256'])
+    insights = insight_rules.batch_insights(disease, matrix, scores['insight_flag'].to_numpy(), t=t_insight)
+    label = scoring.get_spec(disease)['label']
+    results = []
+    for (decision_score, probability, high_risk, insight_flag), row_insights in zip(
+            scores.itertuples(index=False, name=None), insights):
+        results.append({
+            'decision_score': decision_score,
+            'probability': probability,
+            'high_risk': bool(high_risk),
+            'insight_flag': int(insight_flag),
+            'diagnosis': reports.diagnosis_text(label, probability, high_risk, t),
+            'insights': row_insights,
+        })
+    return {'disease': disease, 'model_version': artifact.version, 'results': results}
+
+# ------------------------------------------------
+# 🌐 Routes
+# ------------------------------------------------
+async def _run(request, fn, *args):
+    """Run `fn` on the bounded pool and turn its result or error into a response."""
+    state = request.app.state
+    if state.pending >= MAX_PENDING:
+        return JSONResponse({'error': "Too many requests in flight"}, status_code=503, headers={'Retry-After': '1'})
+    state.pending += 1
+    try:
+        result = await anyio.to_thread.run_sync(fn, *args, limiter=state.limiter)
+    except RequestError as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status)
+    except Exception:
+        # A deployment fault (bad checksum, model/feature mismatch, ...), not the client's
+        traceback.print_exc()
+        return JSONResponse({'error': "Internal server error"}, status_code=500)
+    finally:
+        state.pending -= 1
+    return JSONResponse(result)
+
+
+async def predict_endpoint(request):
+    disease = request.path_params['disease']
+    if disease not in scoring.DISEASES:
+        return JSONResponse({'error': f"Unknown disease {disease!r}"}, status_code=404)
+    body = await request.body()
+    return await _run(request, predict, disease, body, request.query_params.get('language', 'English'))
+
+
+async def batch_endpoint(request):
+    body = await request.body()
+    return await _run(request, predict_batch, body, request.query_params.get('language', 'English'))
+
+
+async def health_endpoint(request):
+    return JSONResponse({'status': 'ok', 'models': {d: scoring.model_version(d) for d in scoring.DISEASES}})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app.state.limiter = anyio.CapacityLimiter(API_THREADS)
+    app.state.pending = 0
+    # Load (and compile) every model and build the percentile indexes before
+    # taking traffic, then watch for new model versions
+    await anyio.to_thread.run_sync(scoring.warm_models)
+    await anyio.to_thread.run_sync(percentiles.warm)
+    scoring.start_reloader()
+    yield
+
+
+app = Starlette(
+    routes=[
+        # Listed before /predict/{disease} so "batch" is not taken for a disease
+        Route('/predict/batch', batch_endpoint, methods=['POST']),
+        Route('/predict/{disease}', predict_endpoint, methods=['POST']),
+        Route('/health', health_endpoint, methods=['GET']),
+    ],
+    lifespan=lifespan,
+)
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the disease models over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help="server processes; compiled models are memory-mapped and shared between them")
+    args = parser.parse_args(argv)
+    uvicorn.run('api:app', app_dir=os.path.dirname(os.path.abspath(__file__)), host=args.host, port=args.port,
+                workers=args.workers, log_level='warning', access_log=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Benchmark script reruns and wall time per prediction on the three pages.
+
+Uses Streamlit's AppTest harness with real rows from the bundled CSVs. The
+current pages collect their inputs in an `st.form`, so a prediction is one
+submit: every input is set and the form is submitted once. In a browser
+only the prediction fragment reruns; AppTest always executes the full
+script, so this number is an upper bound.
+
+With `--before REV`, the page script of that git revision (e.g. the one
+before the forms were introduced) is exported to a temporary directory and
+timed the way it was used: without a form, every input edit reruns the
+whole app, then the button is clicked. Each app runs in its own
+interpreter, so each imports the modules of its own revision.
+
+    python benchmarks/bench_pages.py [--rows 5]
+    python benchmarks/bench_pages.py --before 26b5066^
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_NAME = 'multiple_disease_pred.py'
+PAGES = {
+    'diabetes': ('Diabetes Prediction', ["pregnancies", "glucose", "bp", "skin", "insulin", "bmi", "dpf", "age"]),
+    'heart': ('Heart Disease Prediction', ["age_heart", "sex", "cp", "trestbps", "chol", "fbs", "restecg", "thalach",
+                                           "exang", "oldpeak", "slope", "ca", "thal"]),
+    'parkinsons': ('Parkinsons Prediction', ["fo", "fhi", "flo", "jitter_percent", "jitter_abs", "rap", "ppq", "ddp",
+                                             "shimmer", "shimmer_db", "apq3", "apq5", "apq", "dda", "nhr", "hnr",
+                                             "rpde", "dfa", "spread1", "spread2", "d2", "ppe"]),
+}
+
+
+def set_input(at, key, value):
+    widget = at.number_input(key=key)
+    value = min(max(value, widget.min), widget.max)
+    widget.set_value(int(value) if isinstance(widget.value, int) else float(value))
+
+
+def run_rows(app_dir, page, keys, rows, per_field):
+    """In this interpreter: time each row on `page` of the app in `app_dir`; returns [(runs, seconds)]."""
+    sys.path.insert(0, app_dir)
+    import streamlit_option_menu
+    from streamlit.testing.v1 import AppTest
+
+    # option_menu is a custom component, which AppTest cannot drive; pin the page instead
+    streamlit_option_menu.option_menu = lambda *args, **kwargs: page
+    results = []
+    for row in rows:
+        at = AppTest.from_file(os.path.join(app_dir, APP_NAME), default_timeout=60)
+        at.run()
+        start = time.perf_counter()
+        runs = 1
+        for key, value in zip(keys, row):
+            set_input(at, key, value)
+            if per_field:
+                at.run()
+                runs += 1
+        at.button[0].click().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        results.append((runs, time.perf_counter() - start))
+    return results
+
+
+def measure(app_dir, disease, rows, per_field):
+    """Run `run_rows` in a fresh interpreter rooted at `app_dir`."""
+    page, keys = PAGES[disease]
+    job = json.dumps({'app_dir': app_dir, 'page': page, 'keys': keys, 'rows': rows, 'per_field': per_field})
+    env = dict(os.environ, HEALTH_LOTTIE_OFFLINE='1')
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--job', job], cwd=app_dir, env=env,
+                            capture_output=True, text=True, check=True)
+    results = json.loads(output.stdout.splitlines()[-1])
+    return results[0][0], statistics.median(elapsed for _, elapsed in results) * 1000
+
+
+def export_revision(revision, directory):
+    """Write the tree of `revision` into `directory` (git archive, no checkout)."""
+    archive = subprocess.run(['git', 'archive', '--format=tar', revision], cwd=ROOT, capture_output=True, check=True)
+    with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+        tar.extractall(directory, filter='data')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5, help="dataset rows to submit per page")
+    parser.add_argument('--before', metavar='REV', help="also time the per-field page script of this git revision")
+    parser.add_argument('--job', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.job:
+        job = json.loads(args.job)
+        print(json.dumps(run_rows(job['app_dir'], job['page'], job['keys'], job['rows'], job['per_field'])))
+        return
+
+    sys.path.insert(0, ROOT)
+    import scoring
+
+    apps = [('current', ROOT, False)]
+    before_dir = None
+    if args.before:
+        before_dir = tempfile.mkdtemp(prefix='bench-pages-')
+        export_revision(args.before, before_dir)
+        apps.insert(0, (args.before, before_dir, True))
+    try:
+        print(f"{'page':<11} {'app':<12} {'mode':<9} {'runs':>5} {'wall ms':>9}")
+        for disease in PAGES:
+            rows = scoring.to_matrix(disease, scoring.load_dataset(disease))[:args.rows].tolist()
+            for name, app_dir, per_field in apps:
+                runs, wall = measure(app_dir, disease, rows, per_field)
+                mode = 'per-field' if per_field else 'form'
+                print(f"{disease:<11} {name:<12} {mode:<9} {runs:>5} {wall:>9.1f}")
+    finally:
+        if before_dir is not None:
+            shutil.rmtree(before_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
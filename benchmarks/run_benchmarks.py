@@ -0,0 +1,247 @@
+"""Benchmark suite for the inference, report and page-render hot paths.
+
+Every benchmark uses rows from the bundled CSVs and reports the median
+time per operation over several repeats:
+
+* score_single/<disease>    - one row through the served path (predict_one)
+* score_estimator/<disease> - one row through the pickled estimator
+* score_batch/<disease>     - 10,000 rows in one vectorized call (per row)
+* insights/<disease>        - get_health_insights for one row
+* insights_batch/<disease>  - rule masks and insight lists for 10,000 rows (per row)
+* percentiles/<disease>     - population percentile of every input of one row
+* percentiles_batch/<disease> - the same for 10,000 rows in one call (per row)
+* pdf_report/<disease>      - one report via the report engine
+* pdf_batch/<disease>       - 100 reports in one PDF (per report)
+* dataset_csv/<disease>     - parse the bundled CSV with pandas
+* dataset_load/<disease>    - open the typed columns (reference_data.py) as a DataFrame
+* page_cold, page_warm      - full script run with Streamlit's AppTest;
+                              cold runs in a fresh interpreter
+
+Results are compared with benchmarks/baseline.json and anything slower than
+the baseline by more than --tolerance is reported as a regression:
+
+    python benchmarks/run_benchmarks.py                    # compare
+    python benchmarks/run_benchmarks.py --save-baseline    # record a new baseline
+    python benchmarks/run_benchmarks.py --only score       # subset by prefix
+
+The stored baseline is machine-specific; re-record it on the machine that
+runs the comparison.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import insight_rules
+import percentiles
+import reference_data
+import reports
+import scoring
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+APP = os.path.join(ROOT, 'multiple_disease_pred.py')
+BATCH_ROWS = 10_000
+PDF_BATCH = 100
+
+
+def measure(fn, number, repeat=5):
+    """Median seconds per call of `fn` over `repeat` rounds of `number` calls."""
+    fn()  # warm-up
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+    return statistics.median(rounds)
+
+
+def dataset_rows(disease):
+    return scoring.to_matrix(disease, scoring.load_dataset(disease))
+
+
+def load_app_functions():
+    """Execute the app script in bare mode to reach its module-level functions."""
+    import runpy
+
+    import streamlit.logger
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        app = runpy.run_path(APP)
+    # Bare mode logs a "missing ScriptRunContext" warning on every session_state access
+    streamlit.logger.set_log_level('error')
+    return app
+
+
+def bench_scoring(results):
+    for disease in scoring.DISEASES:
+        rows = dataset_rows(disease)
+        row = rows[0].tolist()
+        model = scoring.load_model(disease)
+        results[f'score_single/{disease}'] = measure(lambda: scoring.predict_one(disease, row, model=model), 2000)
+        bundle = scoring.load_pickled(disease)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            results[f'score_estimator/{disease}'] = measure(
+                lambda: scoring.predict_one(disease, row, model=bundle), 200)
+        batch = np.resize(rows, (BATCH_ROWS, rows.shape[1]))
+        results[f'score_batch/{disease}'] = measure(lambda: scoring.score(disease, batch, model=model), 5) / BATCH_ROWS
+
+
+def bench_insights(results):
+    get_health_insights = load_app_functions()['get_health_insights']
+    for disease, spec in scoring.DISEASES.items():
+        rows = dataset_rows(disease)
+        row = rows[0].tolist()
+        results[f'insights/{disease}'] = measure(lambda: get_health_insights(spec['label'], row, 1), 5000)
+        batch = np.resize(rows, (BATCH_ROWS, rows.shape[1]))
+        flags = np.resize([0, 1], BATCH_ROWS)
+        results[f'insights_batch/{disease}'] = measure(
+            lambda: insight_rules.batch_insights(disease, batch, flags), 5) / BATCH_ROWS
+
+
+def bench_percentiles(results):
+    percentiles.warm()
+    for disease in scoring.DISEASES:
+        rows = dataset_rows(disease)
+        row = rows[0].tolist()
+        results[f'percentiles/{disease}'] = measure(lambda: percentiles.lookup(disease, row), 5000)
+        batch = np.resize(rows, (BATCH_ROWS, rows.shape[1]))
+        results[f'percentiles_batch/{disease}'] = measure(
+            lambda: percentiles.lookup_batch(disease, batch), 5) / BATCH_ROWS
+
+
+def bench_reports(results):
+    for disease, spec in scoring.DISEASES.items():
+        data = scoring.load_dataset(disease).head(PDF_BATCH)
+        scores = scoring.score(disease, data)
+        records = reports.scored_records(disease, data, scores)
+        first = records[0]
+        results[f'pdf_report/{disease}'] = measure(
+            lambda: reports.render_report(first['disease'], first['inputs'], first['diagnosis'], []), 20)
+        results[f'pdf_batch/{disease}'] = measure(lambda: reports.render_batch(records), 1, repeat=3) / len(records)
+
+
+def bench_dataset(results):
+    import pandas as pd
+
+    for disease in scoring.DISEASES:
+        path = reference_data.csv_path(disease)
+        results[f'dataset_csv/{disease}'] = measure(lambda: pd.read_csv(path, encoding='utf-8-sig'), 20)
+
+        def load():
+            # Drop the cached maps so every call opens the files again
+            reference_data._columns.pop(disease, None)
+            return reference_data.frame(disease)
+
+        results[f'dataset_load/{disease}'] = measure(load, 20)
+
+
+PAGE_SCRIPT = r'''
+import sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+assert not at.exception, at.exception
+cold = time.perf_counter() - t0
+warm = []
+for _ in range(10):
+    start = time.perf_counter()
+    at.run()
+    warm.append(time.perf_counter() - start)
+warm.sort()
+print(cold, warm[len(warm) // 2])
+'''
+
+
+def bench_page(results):
+    script = PAGE_SCRIPT.format(root=ROOT, app=APP)
+    env = dict(os.environ, HEALTH_LOTTIE_OFFLINE='1')
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env, check=True)
+    cold, warm = map(float, output.stdout.split()[-2:])
+    results['page_cold'] = cold
+    results['page_warm'] = warm
+
+
+SUITES = {
+    'score': bench_scoring,
+    'insights': bench_insights,
+    'percentiles': bench_percentiles,
+    'pdf': bench_reports,
+    'dataset': bench_dataset,
+    'page': bench_page,
+}
+
+
+def run(only=None):
+    results = {}
+    selected = [name for name in SUITES if not only or any(name.startswith(p) or p.startswith(name) for p in only)]
+    for name in selected:
+        SUITES[name](results)
+    if only:
+        results = {k: v for k, v in results.items() if any(k.startswith(p) for p in only)}
+    return results
+
+
+def format_time(seconds):
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:9.2f} us'
+    if seconds < 1:
+        return f'{seconds * 1e3:9.2f} ms'
+    return f'{seconds:9.2f} s '
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    print(f"{'benchmark':<28} {'current':>12} {'baseline':>12} {'change':>8}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base:
+            change = value / base - 1
+            flag = '  REGRESSION' if change > tolerance else ''
+            print(f"{name:<28} {format_time(value)} {format_time(base)} {change:+7.1%}{flag}")
+            if flag:
+                regressions.append(name)
+        else:
+            print(f"{name:<28} {format_time(value)} {'-':>12} {'new':>8}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the inference, report and page-render hot paths.")
+    parser.add_argument('--only', nargs='*', help="only run benchmarks whose name starts with one of these prefixes")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to benchmarks/baseline.json")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.only)
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {BASELINE_PATH}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""Probability calibration for the decision scores.
+
+The raw `decision_function` values of the SVCs are distances to the
+separating hyperplane, not log-odds, so passing them through a logistic
+sigmoid does not give calibrated probabilities (a Parkinson's score of 1.0
+means ~99% risk in the data but 73% after the sigmoid). This module fits
+Platt scaling or isotonic regression offline on the bundled CSVs and stores
+the result as a uniform interpolation grid over the score range, one file
+per model artifact, named after the artifact's SHA-256:
+
+    saved models/calibration/<disease>/<sha256 prefix>.json
+
+At request time a score maps to a probability with one index computation
+and one linear interpolation, whatever the fitting method. Because the file
+belongs to the model rather than to the disease, rolling back to an older
+registry version brings its calibration back with it. A model without a
+calibration file is scored with the sigmoid; the file is looked for again
+on every such request (one stat), so a calibration fitted later by another
+process is picked up without a restart. `refresh()`, called by the model
+reloader, notices calibrations refitted in place.
+
+    python calibration.py                    # Platt scaling for every model
+    python calibration.py --method isotonic heart
+"""
+import argparse
+import hashlib
+import json
+import numbers
+import os
+import threading
+
+import numpy as np
+
+import compiled_model
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_DIR = os.environ.get('HEALTH_CALIBRATION_DIR',
+                                 os.path.join(working_dir, 'saved models', 'calibration'))
+GRID_POINTS = 257
+# Grid margin beyond the observed scores, as a fraction of their range
+GRID_MARGIN = 0.25
+CV_FOLDS = 5
+
+
+class Calibrator:
+    """Piecewise-linear map from decision score to probability on a uniform grid."""
+
+    def __init__(self, lo, hi, grid, method=None, model_sha256=None):
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.grid = np.ascontiguousarray(grid, dtype=np.float64)
+        self.slopes = np.append(np.diff(self.grid), 0.0)
+        self.inv_step = (len(self.grid) - 1) / (self.hi - self.lo)
+        self.method = method
+        self.model_sha256 = model_sha256
+        # Changes whenever the mapping does; part of the prediction cache key
+        self.fingerprint = hashlib.blake2b(
+            np.array([self.lo, self.hi]).tobytes() + self.grid.tobytes(), digest_size=8).hexdigest()
+        # Python copies for single scores, which would otherwise pay for several tiny arrays
+        self._grid_list = self.grid.tolist()
+        self._slopes_list = self.slopes.tolist()
+        self._last = float(len(self.grid) - 1)
+
+    def __call__(self, scores):
+        """Probabilities in [0, 1]; scores outside the grid take the end values."""
+        if isinstance(scores, numbers.Real):
+            position = min(max((scores - self.lo) * self.inv_step, 0.0), self._last)
+            index = int(position)
+            return self._grid_list[index] + self._slopes_list[index] * (position - index)
+        position = np.clip((np.asarray(scores, dtype=np.float64) - self.lo) * self.inv_step, 0.0, len(self.grid) - 1)
+        index = position.astype(np.intp)
+        return self.grid[index] + self.slopes[index] * (position - index)
+
+    def to_dict(self):
+        return {'method': self.method, 'model_sha256': self.model_sha256, 'lo': self.lo, 'hi': self.hi,
+                'grid': [round(float(p), 10) for p in self.grid]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['lo'], data['hi'], data['grid'], data.get('method'), data.get('model_sha256'))
+
+
+def calibration_path(disease, model_sha256):
+    return os.path.join(CALIBRATION_DIR, disease, f'{model_sha256[:16]}.json')
+
+
+def _file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _read(disease, model_sha256, path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('model_sha256') != model_sha256:
+        print(f"{path} was fitted for another model; ignoring it.")
+        return None
+    return Calibrator.from_dict(data)
+
+
+# (disease, model sha256) -> (Calibrator or None, signature of its file when read)
+_loaded = {}
+_warned = set()
+_lock = threading.Lock()
+
+
+def for_model(disease, model_sha256):
+    """The Calibrator fitted for this exact model, or None (use the sigmoid)."""
+    key = (disease, model_sha256)
+    cached = _loaded.get(key)
+    if cached is not None and cached[0] is not None:
+        return cached[0]
+    # A miss is never final: look at the file again in case it was fitted since
+    path = calibration_path(disease, model_sha256)
+    signature = _file_signature(path)
+    if cached is not None and cached[1] == signature:
+        return None
+    with _lock:
+        calibrator = _read(disease, model_sha256, path) if signature is not None else None
+        _loaded[key] = (calibrator, signature)
+        if calibrator is None and key not in _warned:
+            _warned.add(key)
+            print(f"No calibration for {disease} model {model_sha256[:12]}; using the sigmoid. "
+                  f"Refit with: python calibration.py {disease}")
+    return calibrator
+
+
+def identity(disease, model_sha256):
+    """Fingerprint of the probability mapping used for this model ('sigmoid' without calibration)."""
+    calibrator = for_model(disease, model_sha256)
+    return calibrator.fingerprint if calibrator is not None else 'sigmoid'
+
+
+def refresh():
+    """Drop cached calibrations whose file changed or disappeared since it was read."""
+    with _lock:
+        for key, (calibrator, signature) in list(_loaded.items()):
+            if calibrator is not None and _file_signature(calibration_path(*key)) != signature:
+                del _loaded[key]
+
+
+def _fit_curve(method, scores, labels):
+    """Return a function mapping scores to probabilities."""
+    if method == 'platt':
+        from sklearn.linear_model import LogisticRegression
+
+        # Unregularized 1-D logistic regression: p = sigmoid(a * score + b)
+        model = LogisticRegression(C=1e6).fit(scores.reshape(-1, 1), labels)
+        return lambda s: model.predict_proba(np.asarray(s).reshape(-1, 1))[:, 1]
+    if method == 'isotonic':
+        from sklearn.isotonic import IsotonicRegression
+
+        model = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip').fit(scores, labels)
+        return model.predict
+    raise ValueError(f"Unknown calibration method {method!r}")
+
+
+def brier(probabilities, labels):
+    return float(np.mean((probabilities - labels) ** 2))
+
+
+def fit(disease, method='platt', model=None, model_sha256=None):
+    """Fit a calibrator on the bundled CSV; returns (Calibrator, report dict).
+
+    Calibrates the served model, or `model` (e.g. a registry version that is
+    not active yet) whose artifact has the SHA-256 `model_sha256`.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    import scoring
+
+    if (model is None) != (model_sha256 is None):
+        raise ValueError("Pass both model and model_sha256, or neither")
+    spec = scoring.get_spec(disease)
+    data = scoring.load_dataset(disease)
+    labels = data[spec['target']].to_numpy(dtype=np.float64)
+    scores = scoring.decision_scores(disease, data, model=model)
+
+    span = scores.max() - scores.min()
+    lo, hi = scores.min() - GRID_MARGIN * span, scores.max() + GRID_MARGIN * span
+    curve = _fit_curve(method, scores, labels)
+    calibrator = Calibrator(lo, hi, curve(np.linspace(lo, hi, GRID_POINTS)), method,
+                            model_sha256 or scoring.artifact(disease).manifest['sha256'])
+
+    # The models were trained on these rows, so also report held-out folds
+    held_out = np.empty_like(labels)
+    for train, test in StratifiedKFold(CV_FOLDS, shuffle=True, random_state=0).split(scores, labels):
+        fold = _fit_curve(method, scores[train], labels[train])
+        held_out[test] = fold(scores[test])
+    report = {
+        'rows': int(len(labels)),
+        'brier_sigmoid': brier(scoring.sigmoid(scores), labels),
+        'brier_calibrated': brier(calibrator(scores), labels),
+        'brier_calibrated_cv': brier(held_out, labels),
+    }
+    return calibrator, report
+
+
+def save(disease, calibrator, report=None):
+    """Write the calibration of the model `calibrator` was fitted for."""
+    path = calibration_path(disease, calibrator.model_sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = dict(calibrator.to_dict(), report=report)
+    compiled_model.atomic_write(path, json.dumps(data, indent=1) + '\n')
+    with _lock:
+        _loaded.pop((disease, calibrator.model_sha256), None)
+
+
+def main(argv=None):
+    import scoring
+
+    parser = argparse.ArgumentParser(description="Fit probability calibration for the served models.")
+    parser.add_argument('diseases', nargs='*', metavar='disease',
+                        help=f"diseases to calibrate: {', '.join(scoring.DISEASES)} (default: all)")
+    parser.add_argument('--method', choices=['platt', 'isotonic'], default='platt')
+    args = parser.parse_args(argv)
+    for disease in args.diseases:
+        if disease not in scoring.DISEASES:
+            parser.error(f"unknown disease {disease!r}")
+    for disease in args.diseases or scoring.DISEASES:
+        calibrator, report = fit(disease, args.method)
+        save(disease, calibrator, report)
+        print(f"{disease}: {args.method}, Brier {report['brier_sigmoid']:.4f} (sigmoid) -> "
+              f"{report['brier_calibrated']:.4f} (held-out {report['brier_calibrated_cv']:.4f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""Compact on-disk format for the saved models.
+
+Unpickling a `.sav` bundle pulls in scikit-learn and rebuilds every
+estimator attribute. The compiled format keeps only what scoring needs -
+the linear coefficients or the support vectors, with the scaler already
+applied to them - as plain `.npy` files that are memory-mapped on load, so
+a cold worker starts almost instantly and several worker processes share
+the same pages through the OS page cache.
+
+    saved models/compiled/<disease>/CURRENT            # e.g. "build-k2x9a1"
+    saved models/compiled/<disease>/<build>/meta.json
+    saved models/compiled/<disease>/<build>/*.npy
+
+`meta.json` records the SHA-256 of the source `.sav`, so a compiled model is
+only used while it still matches the pickle it was built from. A build
+directory is never modified once written: a recompile writes a new one and
+replaces CURRENT atomically, so a reader sees either the old build or the
+new one, and processes compiling at the same time do not collide.
+
+The scaler is folded into the model at compile time, so a compiled model
+takes raw inputs in the feature order recorded in `meta.json` and there is
+no separate scaling step. For linear estimators (linear SVC,
+LogisticRegression) w' = w / scale and b' = b - w' . mean. For the RBF SVC,
+with z = (x - mean) / scale,
+
+    ||z - sv||^2 = sum_j (x_j - u_j)^2 / scale_j^2,    u = mean + scale * sv
+
+which expands to x^2 . q - 2 x . (q * u) + ||u||_q^2 with q = 1 / scale^2;
+the support vectors are stored as q * u together with their weighted norms.
+
+    python compiled_model.py          # compile all three models
+    python compiled_model.py --check  # parity against the pickled estimators
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 3
+CURRENT_NAME = 'CURRENT'
+STALE_BUILD_SECONDS = 60
+ARRAY_NAMES = ('coef', 'feature_weights', 'support_vectors', 'sv_norms', 'dual_coef')
+
+
+def _read_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# tempfile creates owner-only files and directories; anything it stages for
+# other processes (possibly another user) gets the mode open() would give
+_UMASK = _read_umask()
+
+
+def default_permissions(path):
+    """chmod a file or directory made by tempfile to 0666/0777 minus the umask."""
+    os.chmod(path, (0o777 if os.path.isdir(path) else 0o666) & ~_UMASK)
+
+
+def atomic_write(path, data):
+    """Replace `path` with `data` (str or bytes); readers see the old or the new file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') if isinstance(data, bytes) else os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        default_permissions(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CompiledModel:
+    """NumPy-only equivalent of a `{'model', 'scaler'}` bundle, scaler folded in.
+
+    Inputs are float64 rows of `n_features` raw values (`features` names
+    them when the scaler was fitted on a DataFrame).
+    """
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.kernel = meta['kernel']
+        self.intercept = float(meta['intercept'])
+        self.gamma = meta.get('gamma')
+        self.features = meta.get('features')
+        self.coef = arrays.get('coef')
+        self.feature_weights = arrays.get('feature_weights')
+        self.support_vectors = arrays.get('support_vectors')
+        self.sv_norms = arrays.get('sv_norms')
+        self.dual_coef = arrays.get('dual_coef')
+        self._local = threading.local()
+
+    @property
+    def n_features(self):
+        return int(self.meta['n_features'])
+
+    def _buffers(self):
+        """Per-thread scratch arrays, allocated once: (row, squared row, kernel row)."""
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            n_support = 0 if self.support_vectors is None else self.support_vectors.shape[0]
+            buffers = self._local.buffers = (np.empty(self.n_features), np.empty(self.n_features),
+                                             np.empty(n_support))
+        return buffers
+
+    def decision_one(self, values):
+        """Score of one row, written into preallocated buffers instead of new arrays."""
+        if len(values) != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {len(values)}")
+        x, x_sq, kernel = self._buffers()
+        x[:] = values
+        if self.kernel == 'linear':
+            return float(np.dot(self.coef, x)) + self.intercept
+        np.multiply(x, x, out=x_sq)
+        np.dot(self.support_vectors, x, out=kernel)
+        kernel *= -2.0
+        kernel += self.sv_norms
+        kernel += np.dot(x_sq, self.feature_weights)
+        np.maximum(kernel, 0.0, out=kernel)
+        kernel *= -self.gamma
+        np.exp(kernel, out=kernel)
+        return float(np.dot(kernel, self.dual_coef)) + self.intercept
+
+    def decision_function(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if self.kernel == 'linear':
+            return X @ self.coef + self.intercept
+        # RBF: sum_i alpha_i * exp(-gamma * ||x - sv_i||^2) + b, distances in the scaled space
+        sq_dists = (
+            ((X * X) @ self.feature_weights)[:, None]
+            - 2.0 * (X @ self.support_vectors.T)
+            + self.sv_norms[None, :]
+        )
+        np.maximum(sq_dists, 0.0, out=sq_dists)
+        return np.exp(-self.gamma * sq_dists) @ self.dual_coef + self.intercept
+
+
+def compile_bundle(bundle):
+    """Build a CompiledModel from an unpickled bundle.
+
+    Raises ValueError for estimators the compiled format does not cover, in
+    which case callers keep using the pickled estimator.
+    """
+    if isinstance(bundle, dict):
+        estimator, scaler = bundle['model'], bundle.get('scaler')
+    else:
+        estimator, scaler = bundle, None
+    classes = getattr(estimator, 'classes_', None)
+    if classes is None or len(classes) != 2:
+        raise ValueError("Only binary classifiers can be compiled")
+
+    n_features = int(estimator.n_features_in_)
+    arrays = {}
+    meta = {'format_version': FORMAT_VERSION, 'estimator': type(estimator).__name__, 'n_features': n_features}
+    mean, scale = np.zeros(n_features), np.ones(n_features)
+    if scaler is not None:
+        if not (getattr(scaler, 'with_mean', True) and getattr(scaler, 'with_std', True)):
+            raise ValueError("Only fully fitted StandardScalers can be compiled")
+        mean = np.asarray(scaler.mean_, dtype=np.float64)
+        scale = np.asarray(scaler.scale_, dtype=np.float64)
+        names = getattr(scaler, 'feature_names_in_', None)
+        if names is not None:
+            meta['features'] = [str(name) for name in names]
+    intercept = float(np.asarray(estimator.intercept_).reshape(-1)[0])
+
+    kernel = getattr(estimator, 'kernel', 'linear')
+    if kernel == 'linear' and hasattr(estimator, 'coef_'):
+        meta['kernel'] = 'linear'
+        coef = np.asarray(estimator.coef_, dtype=np.float64).reshape(-1) / scale
+        intercept -= float(np.dot(coef, mean))
+        arrays['coef'] = np.ascontiguousarray(coef)
+    elif kernel == 'rbf':
+        meta['kernel'] = 'rbf'
+        meta['gamma'] = float(estimator._gamma)
+        weights = 1.0 / (scale * scale)
+        raw_support = mean + scale * np.asarray(estimator.support_vectors_, dtype=np.float64)
+        arrays['feature_weights'] = np.ascontiguousarray(weights)
+        arrays['support_vectors'] = np.ascontiguousarray(raw_support * weights)
+        arrays['sv_norms'] = np.ascontiguousarray((raw_support * raw_support) @ weights)
+        arrays['dual_coef'] = np.ascontiguousarray(np.asarray(estimator.dual_coef_, dtype=np.float64).reshape(-1))
+    else:
+        raise ValueError(f"Unsupported estimator {type(estimator).__name__} with kernel {kernel!r}")
+    meta['intercept'] = intercept
+    return CompiledModel(meta, arrays)
+
+
+def current_build(directory):
+    """Path of the build CURRENT points to in `directory`, or None."""
+    try:
+        with open(os.path.join(directory, CURRENT_NAME), encoding='utf-8') as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(directory, name) if name else None
+
+
+def save_compiled(model, directory, source_sha256=None):
+    """Write `model` as a new build in `directory` and point CURRENT at it."""
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=directory, prefix='.compiling-')
+    try:
+        arrays = [name for name in ARRAY_NAMES if getattr(model, name) is not None]
+        meta = dict(model.meta, source_sha256=source_sha256, arrays=arrays)
+        for name in arrays:
+            np.save(os.path.join(staging, f'{name}.npy'), getattr(model, name))
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+        default_permissions(staging)
+        build = 'build-' + os.path.basename(staging)[len('.compiling-'):]
+        os.rename(staging, os.path.join(directory, build))
+        staging = os.path.join(directory, build)
+        previous = current_build(directory)
+        atomic_write(os.path.join(directory, CURRENT_NAME), build + '\n')
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    # Remove the build we replaced, and any other that is not current and old
+    # enough that no concurrent compile is still about to point CURRENT at it.
+    # Readers that already mapped a build keep their pages; one that read
+    # CURRENT just before a switch finds its build gone and recompiles.
+    current = current_build(directory)
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not name.startswith('build-') or path == current:
+            continue
+        try:
+            stale = path == previous or time.time() - os.path.getmtime(path) > STALE_BUILD_SECONDS
+        except OSError:
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_compiled(directory, source_sha256=None):
+    """Memory-map the current build, or return None if it is missing or stale.
+
+    A build this process may not read (compiled by another user under a
+    strict umask) is reported and also gives None: the caller then scores
+    with an in-memory compile, which works but shares no pages.
+    """
+    try:
+        build = current_build(directory)
+        if build is None:
+            return None
+        with open(os.path.join(build, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format_version') != FORMAT_VERSION:
+            return None
+        if source_sha256 is not None and meta.get('source_sha256') != source_sha256:
+            return None
+        arrays = {name: np.load(os.path.join(build, f'{name}.npy'), mmap_mode='r') for name in meta['arrays']}
+    except FileNotFoundError:
+        return None  # replaced and removed while we were reading it
+    except PermissionError as e:
+        print(f"Cannot read the compiled model in {directory}, compiling in memory: {e}")
+        return None
+    return CompiledModel(meta, arrays)
+
+
+def check_parity(disease, atol=1e-9):
+    """Compare the compiled model with the pickled estimator on every row of
+    the bundled dataset. Returns the maximum absolute score difference."""
+    import scoring
+
+    bundle = scoring.load_pickled(disease)
+    data = scoring.load_dataset(disease)
+    expected = scoring.decision_scores(disease, data, model=bundle)
+    compiled = compile_bundle(bundle)
+    batch = compiled.decision_function(scoring.to_matrix(disease, data))
+    diff = float(np.max(np.abs(batch - expected)))
+    single = np.array([compiled.decision_one(row) for row in scoring.to_matrix(disease, data).tolist()])
+    diff = max(diff, float(np.max(np.abs(single - expected))))
+    if diff > atol:
+        raise AssertionError(f"{disease}: compiled scores differ from decision_function by {diff:.3g}")
+    return diff
+
+
+if __name__ == '__main__':
+    import sys
+
+    import scoring
+
+    for disease in scoring.DISEASES:
+        if '--check' in sys.argv[1:]:
+            print(f"{disease}: max |compiled - decision_function| = {check_parity(disease):.3g}")
+        else:
+            model = scoring.compile_model(disease)
+            print(f"{disease}: {type(model).__name__} -> {scoring.compiled_dir(disease)}")
@@ -0,0 +1,366 @@
+"""Prediction history in an embedded SQLite database.
+
+Every prediction the app makes is recorded with its inputs, risk, model
+version and time, keyed by an opaque user id. The database runs in WAL
+mode, so readers never block the writer or each other.
+
+Writes stay off the request path: `record()` only puts the row on a queue.
+A writer thread drains the queue and commits whatever has accumulated
+(up to `FLUSH_ROWS` rows, or after `FLUSH_INTERVAL` seconds) in one
+transaction, so a burst of predictions costs one fsync rather than one each.
+
+The writer also keeps the aggregate tables of rollups.py up to date in
+the same transaction, for the trend charts.
+
+If the database cannot be opened or written (a read-only tree, a bad
+HEALTH_HISTORY_DB path), `store()` returns a `DisabledHistory` instead:
+predictions are not recorded and every read is empty, but the app keeps
+working.
+
+Anyone who knows a user id can read that user's history, so ids never
+travel on their own: the app hands out `user_token(user_id)`, the id
+signed with HEALTH_HISTORY_SECRET (or a random key kept next to the
+database), and only accepts an id back through `user_for_token`. A token
+is a bearer credential - whoever has the link sees the history - but it
+cannot be forged for someone else's id.
+
+Reads go through two indexes: (user_id, created, id) for a user's history
+and (created) for date ranges. Pages use keyset pagination: the cursor is
+the (created, id) of the last row shown, so page N costs the same as page 1
+instead of an OFFSET scan.
+
+    store = history_store.store()
+    store.record('u-123', 'diabetes', inputs, result)
+    rows, cursor = store.recent('u-123', limit=10)
+    more, cursor = store.recent('u-123', limit=10, before=cursor)
+
+    python history_store.py stats
+    python history_store.py recent <user_id> [--limit 20]
+"""
+import argparse
+import atexit
+import hashlib
+import hmac
+import json
+import os
+import queue
+import secrets
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+import rollups
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+HISTORY_DB = os.environ.get('HEALTH_HISTORY_DB', os.path.join(working_dir, 'history.db'))
+HISTORY_SECRET = os.environ.get('HEALTH_HISTORY_SECRET')
+FLUSH_INTERVAL = float(os.environ.get('HEALTH_HISTORY_FLUSH_MS', '200')) / 1000
+FLUSH_ROWS = int(os.environ.get('HEALTH_HISTORY_FLUSH_ROWS', '500'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    created REAL NOT NULL,
+    disease TEXT NOT NULL,
+    probability REAL NOT NULL,
+    high_risk INTEGER NOT NULL,
+    model_version TEXT,
+    inputs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_user ON predictions (user_id, created, id);
+CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created);
+"""
+COLUMNS = ('id', 'user_id', 'created', 'disease', 'probability', 'high_risk', 'model_version', 'inputs')
+INSERT = ("INSERT INTO predictions (user_id, created, disease, probability, high_risk, model_version, inputs) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+
+def connect(path):
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # With WAL, NORMAL only risks the last transactions on power loss, never corruption
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def _row_dict(row):
+    record = dict(zip(COLUMNS, row))
+    record['high_risk'] = bool(record['high_risk'])
+    record['inputs'] = json.loads(record['inputs'])
+    return record
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB, flush_interval=FLUSH_INTERVAL, flush_rows=FLUSH_ROWS):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.written = 0
+        self.batches = 0
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._writer = connect(path)
+        try:
+            self._writer.executescript(SCHEMA)
+            rollups.ensure(self._writer)
+        except sqlite3.Error:
+            self._writer.close()
+            raise
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, user_id, disease, inputs, result, created=None):
+        """Queue one prediction (a `scoring.predict_one` result); returns immediately."""
+        self._queue.put((
+            str(user_id),
+            time.time() if created is None else created,
+            disease,
+            float(result['probability']),
+            int(bool(result['high_risk'])),
+            result.get('model_version'),
+            json.dumps([float(v) for v in inputs]),
+        ))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _drain(self):
+        """The next batch: rows queued within the flush window, plus any flush events."""
+        first = self._queue.get()
+        if not isinstance(first, tuple):
+            return [first]
+        items = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(items) < self.flush_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            if item is None or isinstance(item, threading.Event):
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._drain()
+            rows = [item for item in items if isinstance(item, tuple)]
+            if rows:
+                try:
+                    with self._writer:
+                        self._writer.executemany(INSERT, rows)
+                        # Same transaction, so the aggregates always match the rows
+                        rollups.apply(self._writer, rows)
+                    self.written += len(rows)
+                    self.batches += 1
+                except sqlite3.Error as e:
+                    print(f"History write of {len(rows)} rows failed: {e}")
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in items:
+                self._writer.close()
+                return
+
+    def connection(self):
+        """This thread's read connection."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = connect(self.path)
+        return connection
+
+    def recent(self, user_id, limit=10, before=None):
+        """A page of `user_id`'s predictions, newest first, and the cursor of the next page.
+
+        `before` is the cursor returned with the previous page; the next
+        cursor is None when there are no more rows.
+        """
+        query = f"SELECT {', '.join(COLUMNS)} FROM predictions WHERE user_id = ?"
+        params = [str(user_id)]
+        if before is not None:
+            query += " AND (created, id) < (?, ?)"
+            params += list(before)
+        query += " ORDER BY created DESC, id DESC LIMIT ?"
+        rows = [_row_dict(row) for row in self.connection().execute(query, params + [limit + 1])]
+        cursor = (rows[limit - 1]['created'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return rows[:limit], cursor
+
+    def between(self, start, end, disease=None, limit=1000):
+        """Predictions of every user with `start <= created < end` (Unix seconds), oldest first."""
+        query = f"SELECT {', '.join(COLUMNS)} FROM predictions WHERE created >= ? AND created < ?"
+        params = [start, end]
+        if disease is not None:
+            query += " AND disease = ?"
+            params.append(disease)
+        query += " ORDER BY created LIMIT ?"
+        return [_row_dict(row) for row in self.connection().execute(query, params + [limit])]
+
+    def weekly_cohort(self, disease=None, weeks=12):
+        return rollups.weekly_cohort(self.connection(), disease, weeks)
+
+    def user_trend(self, user_id, days=90):
+        return rollups.user_trend(self.connection(), user_id, days)
+
+    def count(self, user_id=None):
+        if user_id is None:
+            return self.connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        return self.connection().execute("SELECT COUNT(*) FROM predictions WHERE user_id = ?",
+                                         (str(user_id),)).fetchone()[0]
+
+
+class DisabledHistory:
+    """Stand-in for HistoryStore when the database is unavailable."""
+
+    path = None
+    written = 0
+    batches = 0
+
+    def __init__(self, reason):
+        self.reason = reason
+
+    def record(self, user_id, disease, inputs, result, created=None):
+        pass
+
+    def flush(self, timeout=None):
+        return True
+
+    def close(self):
+        pass
+
+    def recent(self, user_id, limit=10, before=None):
+        return [], None
+
+    def between(self, start, end, disease=None, limit=1000):
+        return []
+
+    def weekly_cohort(self, disease=None, weeks=12):
+        return []
+
+    def user_trend(self, user_id, days=90):
+        return []
+
+    def count(self, user_id=None):
+        return 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """The process-wide HistoryStore on HISTORY_DB, or a DisabledHistory if it can't be opened."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = HistoryStore()
+                except (OSError, sqlite3.Error) as e:
+                    # Read-only deployment: serve predictions without history
+                    print(f"Prediction history disabled, cannot open {HISTORY_DB}: {e}")
+                    _store = DisabledHistory(str(e))
+    return _store
+
+
+_secret = None
+
+
+def _token_secret():
+    """HEALTH_HISTORY_SECRET, else a key file created once next to HISTORY_DB.
+
+    Where that file cannot be written, the key lives only as long as the
+    process and links from before a restart start a new history.
+    """
+    global _secret
+    if _secret is None:
+        with _store_lock:
+            if _secret is None:
+                _secret = HISTORY_SECRET.encode() if HISTORY_SECRET else _read_key_file(HISTORY_DB + '.key')
+    return _secret
+
+
+def _read_key_file(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    try:
+        # Written aside and linked into place, so concurrent first starts agree on one key
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(secrets.token_bytes(32))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError as e:
+        print(f"Cannot keep a history key at {path}, history links last until restart: {e}")
+        return secrets.token_bytes(32)
+
+
+def _signature(user_id):
+    return hmac.new(_token_secret(), user_id.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def user_token(user_id):
+    """The signed token that stands for `user_id` in a link."""
+    return f"{user_id}.{_signature(user_id)}"
+
+
+def user_for_token(token):
+    """The user id `token` was issued for, or None if it is missing or forged."""
+    user_id, _, signature = str(token or '').rpartition('.')
+    if not user_id or not hmac.compare_digest(signature, _signature(user_id)):
+        return None
+    return user_id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the prediction history database.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help="row counts per disease")
+    recent_parser = commands.add_parser('recent', help="latest predictions of one user")
+    recent_parser.add_argument('user_id')
+    recent_parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    history = store()
+    if isinstance(history, DisabledHistory):
+        sys.exit(f"{HISTORY_DB}: {history.reason}")
+    if args.command == 'stats':
+        rows = history.connection().execute(
+            "SELECT disease, COUNT(*), SUM(high_risk), COUNT(DISTINCT user_id) FROM predictions GROUP BY disease")
+        print(f"{HISTORY_DB}: {history.count()} predictions")
+        for disease, count, high_risk, users in rows:
+            print(f"  {disease:<11} {count:>9} rows  {high_risk:>9} high risk  {users:>7} users")
+    elif args.command == 'recent':
+        rows, _ = history.recent(args.user_id, limit=args.limit)
+        for row in rows:
+            when = time.strftime('%Y-%m-%d %H:%M', time.localtime(row['created']))
+            print(f"{when}  {row['disease']:<11} {row['probability']:5.1f}%  {row['model_version']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Translation catalogs.
+
+Each language lives in `locales/<code>.json` with three sections: `ui`
+(page text), `inputs` (input labels and BMI messages) and `insights`
+(health insight texts). Catalogs are parsed once per process and shared by
+every session and rerun, so switching language is a dictionary swap.
+
+Validate the catalogs (e.g. in CI, before deploying) with:
+
+    python i18n.py            # fail on keys missing from any locale
+    python i18n.py --strict   # also fail on keys used in code but never translated
+"""
+import json
+import os
+import re
+import sys
+from functools import lru_cache
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+LOCALE_DIR = os.path.join(working_dir, 'locales')
+LANGUAGES = {'English': 'en', 'Hindi': 'hi', 'Tamil': 'ta'}
+REFERENCE_LANGUAGE = 'English'
+SECTIONS = ('ui', 'inputs', 'insights')
+# Files scanned for t('...'), t_input('...') and t_insight('...') keys
+SOURCE_FILES = ('multiple_disease_pred.py', 'reports.py')
+SECTION_FUNCTIONS = {'t': 'ui', 't_input': 'inputs', 't_insight': 'insights'}
+
+
+@lru_cache(maxsize=None)
+def catalog(language):
+    """Return {'ui': {...}, 'inputs': {...}, 'insights': {...}} for `language`."""
+    with open(os.path.join(LOCALE_DIR, f'{LANGUAGES[language]}.json'), encoding='utf-8') as f:
+        data = json.load(f)
+    return {section: data.get(section, {}) for section in SECTIONS}
+
+
+def identity(key):
+    """The translator used when none is given: every key is its own text."""
+    return key
+
+
+def translator(language, section='ui'):
+    """A `key -> text` function for one section, falling back to the key itself."""
+    table = catalog(language)[section]
+    return lambda key: table.get(key, key)
+
+
+def missing_keys():
+    """Keys present in the reference language but missing from another locale."""
+    reference = catalog(REFERENCE_LANGUAGE)
+    problems = []
+    for language in LANGUAGES:
+        current = catalog(language)
+        for section in SECTIONS:
+            for key in reference[section].keys() - current[section].keys():
+                problems.append((language, section, key))
+    return sorted(problems)
+
+
+def untranslated_keys():
+    """Literal keys passed to t()/t_input()/t_insight(), or named in the insight
+    rule tables, that no catalog defines."""
+    import insight_rules
+
+    reference = catalog(REFERENCE_LANGUAGE)
+    pattern = re.compile(r"\b(t|t_input|t_insight)\((['\"])(.+?)\2\)")
+    problems = set()
+    for name in SOURCE_FILES:
+        with open(os.path.join(working_dir, name), encoding='utf-8') as f:
+            source = f.read()
+        for function, _, key in pattern.findall(source):
+            section = SECTION_FUNCTIONS[function]
+            if key not in reference[section]:
+                problems.add((section, key))
+    for key in insight_rules.all_keys() - reference['insights'].keys():
+        problems.add(('insights', key))
+    return sorted(problems)
+
+
+if __name__ == '__main__':
+    strict = '--strict' in sys.argv[1:]
+    missing = missing_keys()
+    for language, section, key in missing:
+        print(f"MISSING {language}/{section}: {key}")
+    untranslated = untranslated_keys()
+    for section, key in untranslated:
+        print(f"{'ERROR' if strict else 'warning'}: untranslated {section} key used in code: {key}")
+    print(f"{len(LANGUAGES)} locales, {len(missing)} missing keys, {len(untranslated)} untranslated keys")
+    if missing or (strict and untranslated):
+        sys.exit(1)
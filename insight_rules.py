@@ -0,0 +1,126 @@
+"""Declarative health-insight rules.
+
+Each disease has a table of `(insight key, feature, operator, threshold)`
+rules over the model's input columns, followed by the high/low risk insight
+and a general tip. The same table serves two paths:
+
+* `health_insights` - one patient, plain Python comparisons (the UI path)
+* `batch_insights`  - N patients; the table is compiled to one NumPy
+  comparison per operator, giving an N x R boolean mask, and rows with the
+  same mask pattern share one insight list
+
+Insight keys index the `insights` section of the locale catalogs and are
+translated with the `t` function passed in.
+
+    masks = rule_masks('heart', frame)                      # N x R bool
+    texts = batch_insights('heart', frame, scores['insight_flag'])
+"""
+import operator
+from functools import lru_cache
+
+import numpy as np
+
+import i18n
+import scoring
+
+# (insight key, feature, operator, threshold), in display order
+RULES = {
+    'diabetes': [
+        ('high_glucose', "Glucose", '>', 140),
+        ('obesity_risk', "BMI", '>', 30),
+        ('age_diabetes_risk', "Age", '>', 45),
+        ('pregnancy_risk', "Pregnancies", '>', 3),
+    ],
+    'heart': [
+        ('hypertension_risk', "trestbps", '>', 140),
+        ('high_cholesterol', "chol", '>', 240),
+        ('angina_warning', "exang", '==', 1),
+        ('age_heart_risk', "age", '>', 55),
+    ],
+    'parkinsons': [
+        ('voice_changes', "MDVP:Fo(Hz)", '<', 100),
+        ('vocal_instability', "MDVP:Jitter(%)", '>', 0.05),
+    ],
+}
+
+# Keys appended after the rule insights: (high risk, low risk, general tip)
+OUTCOME_KEYS = {
+    'diabetes': ('diabetes_high_risk', 'diabetes_low_risk', 'diabetes_general_tip'),
+    'heart': ('heart_high_risk', 'heart_low_risk', 'heart_general_tip'),
+    'parkinsons': ('parkinsons_high_risk', 'parkinsons_low_risk', 'parkinsons_general_tip'),
+}
+
+OPERATORS = {'>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le, '==': operator.eq}
+
+
+def all_keys():
+    """Every insight key referenced by the rule tables."""
+    keys = set()
+    for disease, rules in RULES.items():
+        keys.update(key for key, _, _, _ in rules)
+        keys.update(OUTCOME_KEYS[disease])
+    return keys
+
+
+@lru_cache(maxsize=None)
+def compile_rules(disease):
+    """Group the rules by operator as (op, rule positions, column indices, thresholds)."""
+    features = scoring.get_spec(disease)['features']
+    groups = {}
+    for position, (key, feature, op, threshold) in enumerate(RULES[disease]):
+        groups.setdefault(op, []).append((position, features.index(feature), threshold))
+    compiled = []
+    for op, members in groups.items():
+        positions, columns, thresholds = zip(*members)
+        compiled.append((OPERATORS[op], np.array(positions), np.array(columns),
+                         np.array(thresholds, dtype=np.float64)))
+    return tuple(compiled)
+
+
+@lru_cache(maxsize=None)
+def _row_rules(disease):
+    features = scoring.get_spec(disease)['features']
+    return tuple((key, features.index(feature), OPERATORS[op], threshold)
+                 for key, feature, op, threshold in RULES[disease])
+
+
+def rule_masks(disease, data):
+    """N x R boolean matrix: row i, column j is True when rule j fires for patient i."""
+    matrix = scoring.to_matrix(disease, data)
+    masks = np.zeros((len(matrix), len(RULES[disease])), dtype=bool)
+    for compare, positions, columns, thresholds in compile_rules(disease):
+        masks[:, positions] = compare(matrix[:, columns], thresholds)
+    return masks
+
+
+def _keys_for(disease, fired, high_risk):
+    high_key, low_key, tip_key = OUTCOME_KEYS[disease]
+    keys = [key for (key, _, _, _), hit in zip(RULES[disease], fired) if hit]
+    keys.append(high_key if high_risk else low_key)
+    keys.append(tip_key)
+    return keys
+
+
+def health_insights(disease, values, insight_flag, t=i18n.identity):
+    """Translated insights for one patient; `values` are in model feature order."""
+    high_key, low_key, tip_key = OUTCOME_KEYS[disease]
+    insights = [t(key) for key, column, compare, threshold in _row_rules(disease) if compare(values[column], threshold)]
+    insights.append(t(high_key if insight_flag == 1 else low_key))
+    insights.append(t(tip_key))
+    return insights
+
+
+def batch_insights(disease, data, insight_flags, t=i18n.identity):
+    """Translated insight lists for every row of `data`.
+
+    `insight_flags` is the per-row high/low risk flag, e.g. the
+    `insight_flag` column of `scoring.score`. Rows sharing a mask pattern
+    share one (read-only) list, so translation runs once per pattern.
+    """
+    masks = rule_masks(disease, data)
+    flags = np.asarray(insight_flags).astype(bool).reshape(-1, 1)
+    patterns = np.hstack([masks, flags])
+    codes = patterns @ (1 << np.arange(patterns.shape[1], dtype=np.int64))
+    _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+    lists = [[t(key) for key in _keys_for(disease, patterns[i, :-1], patterns[i, -1])] for i in first]
+    return [lists[i] for i in inverse.reshape(-1).tolist()]
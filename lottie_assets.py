@@ -0,0 +1,102 @@
+"""Offline cache for the Lottie animations used by the app.
+
+Pages only ever read animations from the on-disk cache, so rendering never
+waits on the network and works in air-gapped deployments. Missing files are
+fetched once in a background thread with a strict timeout; a page that
+renders before the download finishes simply shows no animation.
+
+To vendor the files ahead of time (e.g. before shipping to a machine
+without internet access):
+
+    python lottie_assets.py
+"""
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import metrics
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('HEALTH_LOTTIE_DIR', os.path.join(working_dir, 'assets', 'lottie'))
+# Set HEALTH_LOTTIE_OFFLINE=1 to never touch the network at runtime
+OFFLINE = os.environ.get('HEALTH_LOTTIE_OFFLINE', '0') == '1'
+TIMEOUT = float(os.environ.get('HEALTH_LOTTIE_TIMEOUT', '3'))
+
+ANIMATIONS = {
+    'home': "https://lottie.host/7c7125a7-37ec-44ac-8b8d-11a9b988d3bb/cxtshyITFK.json",
+    'diabetes': "https://lottie.host/e4d1c1b4-1a6d-4b16-bb28-548abebd7a94/VNnDL3lbvM.json",
+    'heart': "https://lottie.host/3c4cb70b-8e8c-4c1a-9c5a-fefcbe4e056f/R2BzYbCjCI.json",
+    'parkinson': "https://lottie.host/760cb2d4-16fa-4899-a53f-95b3c9f784d1/hPl6x8nG6u.json",
+}
+
+_loaded = {}
+_fetch_started = False
+_fetch_lock = threading.Lock()
+
+
+def asset_path(name):
+    return os.path.join(CACHE_DIR, f'{name}.json')
+
+
+def load_animation(name):
+    """Return the cached animation JSON for `name`, or None if it isn't on disk yet."""
+    if name in _loaded:
+        return _loaded[name]
+    try:
+        with open(asset_path(name), encoding='utf-8') as f:
+            animation = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Only hits are memoized so a file written later by the fetcher is picked up
+    _loaded[name] = animation
+    return animation
+
+
+def fetch_animation(name, timeout=TIMEOUT):
+    """Download one animation into the cache. Returns True on success."""
+    try:
+        with metrics.timer('lottie_fetch', name):
+            r = requests.get(ANIMATIONS[name], timeout=timeout)
+            if r.status_code != 200:
+                return False
+            animation = r.json()
+    except (requests.RequestException, ValueError):
+        return False
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(animation, f)
+    os.replace(tmp_path, asset_path(name))
+    return True
+
+
+def fetch_missing(timeout=TIMEOUT):
+    """Concurrently download every animation not yet in the cache."""
+    missing = [name for name in ANIMATIONS if not os.path.exists(asset_path(name))]
+    if not missing:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+        return dict(zip(missing, pool.map(lambda name: fetch_animation(name, timeout), missing)))
+
+
+def start_background_fetch():
+    """Fill the cache in a daemon thread, at most once per process."""
+    global _fetch_started
+    if OFFLINE:
+        return
+    with _fetch_lock:
+        if _fetch_started:
+            return
+        _fetch_started = True
+    threading.Thread(target=fetch_missing, name='lottie-fetch', daemon=True).start()
+
+
+if __name__ == '__main__':
+    results = fetch_missing()
+    for name in ANIMATIONS:
+        status = 'fetched' if results.get(name) else ('cached' if os.path.exists(asset_path(name)) else 'FAILED')
+        print(f"{name}: {status} ({asset_path(name)})")
@@ -0,0 +1,210 @@
+"""Per-stage latency histograms with a Prometheus text endpoint.
+
+Stages are timed with `timer(stage, disease)` and recorded into
+process-wide histograms labelled by stage and disease:
+
+    with metrics.timer('decision_function', 'diabetes'):
+        ...
+
+Set HEALTH_METRICS_PORT to serve the Prometheus text format at
+`http://<host>:<port>/metrics`, and/or HEALTH_METRICS_DUMP_INTERVAL (seconds)
+to print a p50/p99 summary to stdout periodically. Both are started at most
+once per process.
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, from 10 us (compiled single-row scoring) to 10 s
+BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = 'health_stage_duration_seconds'
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def quantile(self, q):
+        """Estimate the q-quantile by linear interpolation inside its bucket."""
+        counts, count, _ = self.snapshot()
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        for i, n in enumerate(counts):
+            if cumulative + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.buckets[-1]
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+_gauges = {}
+
+
+def histogram(stage, disease=None):
+    key = (stage, disease or '')
+    hist = _histograms.get(key)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.setdefault(key, Histogram())
+    return hist
+
+
+def observe(stage, seconds, disease=None):
+    histogram(stage, disease).observe(seconds)
+
+
+class timer:
+    """Context manager recording the elapsed time of a stage."""
+    __slots__ = ('hist', 'start')
+
+    def __init__(self, stage, disease=None):
+        self.hist = histogram(stage, disease)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start)
+        return False
+
+
+def register_gauge(name, help_text, fn):
+    """Expose `fn()` (a number) as a gauge, e.g. cache sizes or hit rates."""
+    _gauges[name] = (help_text, fn)
+
+
+def _format_le(bound):
+    return f'{bound:g}'
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    lines = [f'# HELP {METRIC_NAME} Latency of each processing stage.', f'# TYPE {METRIC_NAME} histogram']
+    for (stage, disease), hist in sorted(_histograms.items()):
+        counts, count, total = hist.snapshot()
+        labels = f'stage="{stage}",disease="{disease}"'
+        cumulative = 0
+        for bound, n in zip(hist.buckets, counts):
+            cumulative += n
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{_format_le(bound)}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {count}')
+        lines.append(f'{METRIC_NAME}_sum{{{labels}}} {total:.9f}')
+        lines.append(f'{METRIC_NAME}_count{{{labels}}} {count}')
+    for name, (help_text, fn) in sorted(_gauges.items()):
+        try:
+            value = float(fn())
+        except Exception:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+    return '\n'.join(lines) + '\n'
+
+
+def summary():
+    """{(stage, disease): {'count', 'p50_ms', 'p99_ms'}} for quick inspection."""
+    result = {}
+    for key, hist in sorted(_histograms.items()):
+        p50, p99 = hist.quantile(0.5), hist.quantile(0.99)
+        result[key] = {'count': hist.count, 'p50_ms': p50 * 1000 if p50 is not None else None,
+                       'p99_ms': p99 * 1000 if p99 is not None else None}
+    return result
+
+
+def format_summary():
+    lines = []
+    for (stage, disease), row in summary().items():
+        if row['count']:
+            lines.append(f"{stage:<18} {disease or '-':<11} n={row['count']:<7} "
+                         f"p50={row['p50_ms']:.3f}ms p99={row['p99_ms']:.3f}ms")
+    return '\n'.join(lines)
+
+# ------------------------------------------------
+# 📡 Exporters
+# ------------------------------------------------
+_started = set()
+_started_lock = threading.Lock()
+
+
+def _start_once(name):
+    with _started_lock:
+        if name in _started:
+            return False
+        _started.add(name)
+        return True
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='0.0.0.0'):
+    """Serve /metrics on a daemon thread; returns False if already running."""
+    if not _start_once('http'):
+        return False
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return True
+
+
+def start_periodic_dump(interval):
+    if not _start_once('dump'):
+        return False
+
+    def dump():
+        while True:
+            time.sleep(interval)
+            text = format_summary()
+            if text:
+                print(f"--- stage latency ({time.strftime('%H:%M:%S')}) ---\n{text}", flush=True)
+
+    threading.Thread(target=dump, name='metrics-dump', daemon=True).start()
+    return True
+
+
+def start_from_env():
+    """Start the exporters configured through environment variables."""
+    port = os.environ.get('HEALTH_METRICS_PORT')
+    if port:
+        try:
+            start_http_server(int(port))
+        except OSError as e:
+            # Another worker process on the same host already owns the port
+            print(f"Metrics endpoint not started on port {port}: {e}")
+    interval = os.environ.get('HEALTH_METRICS_DUMP_INTERVAL')
+    if interval:
+        start_periodic_dump(float(interval))
@@ -0,0 +1,211 @@
+"""Versioned model artifacts.
+
+Each disease has a directory of immutable versions and a CURRENT pointer:
+
+    saved models/registry/<disease>/CURRENT          # e.g. "v3"
+    saved models/registry/<disease>/v3/model.sav
+    saved models/registry/<disease>/v3/manifest.json
+
+The manifest records the artifact's SHA-256, the feature order it was
+published with (checked on load), the scikit-learn version that validated
+it (a different one is reported when the pickle is loaded) and the
+estimator type. Thresholds are not per version: they come from
+thresholds.json (see scoring.py). CURRENT is replaced atomically, so a reader
+either sees the old version or the new one. Running processes pick up a new
+CURRENT in the background (see `scoring.start_reloader`) without restarting.
+
+Diseases without a registry directory use the `.sav` file shipped in
+`saved models/`; its version is reported as `legacy-<sha256 prefix>`.
+
+    python model_registry.py list
+    python model_registry.py publish diabetes retrained.sav [--no-activate] [--notes "..."]
+    python model_registry.py activate diabetes v2      # also used to roll back
+    python model_registry.py verify
+"""
+import argparse
+import json
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from compiled_model import atomic_write, default_permissions, file_sha256
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+REGISTRY_DIR = os.environ.get('HEALTH_MODEL_REGISTRY', os.path.join(working_dir, 'saved models', 'registry'))
+ARTIFACT_NAME = 'model.sav'
+MANIFEST_NAME = 'manifest.json'
+CURRENT_NAME = 'CURRENT'
+VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+# `signature` is a cheap value that changes whenever the active artifact does
+Artifact = namedtuple('Artifact', 'disease version path manifest signature')
+
+
+def disease_dir(disease):
+    return os.path.join(REGISTRY_DIR, disease)
+
+
+def version_dir(disease, version):
+    return os.path.join(disease_dir(disease), version)
+
+
+def versions(disease):
+    """Published versions of `disease`, oldest first."""
+    try:
+        names = os.listdir(disease_dir(disease))
+    except FileNotFoundError:
+        return []
+    numbered = [(int(m.group(1)), name) for name in names if (m := VERSION_PATTERN.match(name))]
+    return [name for _, name in sorted(numbered)]
+
+
+def current_version(disease):
+    try:
+        with open(os.path.join(disease_dir(disease), CURRENT_NAME), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None  # no registry; a pointer we may not read is an error, not a fallback
+
+
+def read_manifest(disease, version):
+    with open(os.path.join(version_dir(disease, version), MANIFEST_NAME), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def resolve(disease, legacy_path):
+    """The active Artifact of `disease`, falling back to `legacy_path`."""
+    version = current_version(disease)
+    if version is not None:
+        return Artifact(disease, version, os.path.join(version_dir(disease, version), ARTIFACT_NAME),
+                        read_manifest(disease, version), ('registry', version))
+    st = os.stat(legacy_path)
+    sha256 = file_sha256(legacy_path)
+    return Artifact(disease, f'legacy-{sha256[:8]}', legacy_path, {'sha256': sha256},
+                    ('legacy', st.st_mtime_ns, st.st_size))
+
+
+def signature(disease, legacy_path):
+    """What `resolve(...).signature` would be, without reading or hashing the artifact."""
+    version = current_version(disease)
+    if version is not None:
+        return 'registry', version
+    try:
+        st = os.stat(legacy_path)
+    except OSError:
+        return None
+    return 'legacy', st.st_mtime_ns, st.st_size
+
+
+def verify(artifact):
+    """Raise ValueError if the artifact's bytes no longer match its manifest."""
+    actual = file_sha256(artifact.path)
+    if actual != artifact.manifest['sha256']:
+        raise ValueError(f"{artifact.disease} {artifact.version}: checksum mismatch "
+                         f"(manifest {artifact.manifest['sha256'][:12]}, file {actual[:12]})")
+    return actual
+
+
+def activate(disease, version):
+    if version not in versions(disease):
+        raise ValueError(f"{disease} has no version {version!r}; published: {versions(disease)}")
+    atomic_write(os.path.join(disease_dir(disease), CURRENT_NAME), version + '\n')
+
+
+def publish(disease, source_path, activate_now=True, notes=None):
+    """Validate `source_path`, copy it in as the next version and optionally activate it."""
+    import sklearn
+
+    import scoring
+
+    spec = scoring.get_spec(disease)
+    with open(source_path, 'rb') as f:
+        bundle = pickle.load(f)
+    if not isinstance(bundle, dict) or 'model' not in bundle:
+        raise ValueError("Expected a {'model': estimator, 'scaler': scaler} bundle")
+    estimator, scaler = bundle['model'], bundle.get('scaler')
+    n_features = getattr(estimator, 'n_features_in_', None)
+    if n_features != len(spec['features']):
+        raise ValueError(f"{disease} expects {len(spec['features'])} features, the estimator has {n_features}")
+    names = getattr(scaler, 'feature_names_in_', None)
+    if names is not None and list(names) != spec['features']:
+        raise ValueError(f"Scaler feature order {list(names)} does not match {spec['features']}")
+    # Must score the reference rows without errors before it can be served
+    scoring.decision_scores(disease, scoring.load_dataset(disease).head(5), model=bundle)
+
+    existing = versions(disease)
+    version = f'v{int(VERSION_PATTERN.match(existing[-1]).group(1)) + 1 if existing else 1}'
+    os.makedirs(disease_dir(disease), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=disease_dir(disease), prefix='.publishing-')
+    try:
+        shutil.copyfile(source_path, os.path.join(staging, ARTIFACT_NAME))
+        manifest = {
+            'disease': disease,
+            'version': version,
+            'sha256': file_sha256(os.path.join(staging, ARTIFACT_NAME)),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'estimator': type(estimator).__name__,
+            'sklearn_version': sklearn.__version__,
+            'features': spec['features'],
+            'notes': notes,
+        }
+        with open(os.path.join(staging, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        default_permissions(staging)
+        os.rename(staging, version_dir(disease, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if activate_now:
+        activate(disease, version)
+    return version
+
+
+def main(argv=None):
+    import scoring
+
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="show published versions and the active one")
+    publish_parser = commands.add_parser('publish', help="add a new version from a .sav bundle")
+    publish_parser.add_argument('disease', choices=sorted(scoring.DISEASES))
+    publish_parser.add_argument('path')
+    publish_parser.add_argument('--no-activate', action='store_true', help="publish without serving it")
+    publish_parser.add_argument('--notes')
+    activate_parser = commands.add_parser('activate', help="serve a published version (or roll back)")
+    activate_parser.add_argument('disease', choices=sorted(scoring.DISEASES))
+    activate_parser.add_argument('version')
+    commands.add_parser('verify', help="check the checksums of every active artifact")
+    args = parser.parse_args(argv)
+
+    if args.command == 'publish':
+        version = publish(args.disease, args.path, activate_now=not args.no_activate, notes=args.notes)
+        print(f"{args.disease}: published {version}{'' if args.no_activate else ' (active)'}")
+    elif args.command == 'activate':
+        activate(args.disease, args.version)
+        print(f"{args.disease}: {args.version} is now active")
+    elif args.command == 'list':
+        for disease in scoring.DISEASES:
+            active = current_version(disease)
+            published = ', '.join(v + ('*' if v == active else '') for v in versions(disease)) or '-'
+            print(f"{disease:<11} {published}   active: {scoring.artifact(disease).version}")
+    elif args.command == 'verify':
+        failed = False
+        for disease in scoring.DISEASES:
+            artifact = scoring.artifact(disease)
+            try:
+                verify(artifact)
+                print(f"{disease}: {artifact.version} OK")
+            except (OSError, ValueError) as e:
+                print(f"{disease}: {e}")
+                failed = True
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Process-wide LRU/TTL cache of prediction results.
+
+Entries are keyed on the disease plus a hash of the canonical float64 input
+vector, so `[0, 0, 0.0]` and `(0.0, -0.0, 0)` hit the same entry - which
+matters because every user first submits the all-zero defaults. Keys also
+carry the served model version and the fingerprint of its calibration, so a
+hot-reloaded model (see `scoring.start_reloader`) or a newly fitted
+calibration never returns results of the previous one, and the old entries
+are dropped when the first request sees the new ones. Both come from one
+`scoring.load_entry` read, and a miss is computed with that same entry, so
+a reload in between cannot file one model's result under another's key.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import scoring
+
+CACHE_SIZE = int(os.environ.get('HEALTH_CACHE_SIZE', '10000'))
+CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL', '3600'))
+
+
+def input_key(disease, values):
+    vector = scoring.to_matrix(disease, values).reshape(-1) + 0.0  # folds -0.0 into 0.0
+    return disease, hashlib.blake2b(vector.tobytes(), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def _check_model(self, disease, entry):
+        """Return the (model version, calibration) of `entry`, dropping entries of replaced ones."""
+        artifact = entry[1]
+        version = artifact.version, scoring.calibration_identity(disease, artifact)
+        previous = self._versions.setdefault(disease, version)
+        if version != previous:
+            self._versions[disease] = version
+            self.invalidate(disease)
+        return version
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            result, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, disease, values, compute):
+        """Return the cached result for `values`, calling `compute(entry)` on a miss.
+
+        `entry` is the `scoring.load_entry` pair the key was built from;
+        `compute` must score with it.
+        """
+        entry = scoring.load_entry(disease)
+        key = input_key(disease, values) + (self._check_model(disease, entry),)
+        result = self.get(key)
+        if result is None:
+            result = compute(entry)
+            self.put(key, result)
+        return dict(result)
+
+    def invalidate(self, disease=None):
+        with self._lock:
+            if disease is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == disease]:
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,212 @@
+"""Typed columnar copies of the bundled reference CSVs.
+
+Each dataset is converted once into one `.npy` file per dtype, with the
+dtype of every column fixed by `SCHEMAS`, plus a `schema.json`:
+
+    reference/<disease>/schema.json
+    reference/<disease>/float64.npy    # columns x rows
+    reference/<disease>/int8.npy
+    ...
+
+A file holds one column per row, so every column is a contiguous slice of
+it. Loading memory-maps the files, so no text is parsed, pages are shared
+between processes through the OS page cache and only the columns actually
+touched are read from disk; one file per dtype rather than per column keeps
+the number of opens (and .npy header parses) at two or three per dataset.
+Integer-coded fields use the narrowest type that holds their range (int8
+for the binary and categorical heart fields, the labels and small counts;
+int16 for measurements such as cholesterol). Continuous measurements stay
+float64: they are model inputs, and a float32 round trip would change the
+scores.
+
+`schema.json` records the size and mtime of the source CSV. A stale or
+missing conversion is rebuilt on first use, like the compiled models.
+Conversion fails if a value does not fit its declared dtype exactly.
+
+    python reference_data.py           # convert all three datasets
+    python reference_data.py --check   # compare the columns with the CSVs
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+REFERENCE_DIR = os.environ.get('HEALTH_REFERENCE_DIR', os.path.join(working_dir, 'reference'))
+FORMAT_VERSION = 2
+
+# Column -> dtype, in CSV column order. 'str' columns become fixed-width unicode.
+SCHEMAS = {
+    'diabetes': {
+        'Pregnancies': 'int8', 'Glucose': 'int16', 'BloodPressure': 'int16', 'SkinThickness': 'int16',
+        'Insulin': 'int16', 'BMI': 'float64', 'DiabetesPedigreeFunction': 'float64', 'Age': 'int8',
+        'Outcome': 'int8',
+    },
+    'heart': {
+        'age': 'int8', 'sex': 'int8', 'cp': 'int8', 'trestbps': 'int16', 'chol': 'int16', 'fbs': 'int8',
+        'restecg': 'int8', 'thalach': 'int16', 'exang': 'int8', 'oldpeak': 'float64', 'slope': 'int8',
+        'ca': 'int8', 'thal': 'int8', 'target': 'int8',
+    },
+    'parkinsons': dict(
+        {'name': 'str'},
+        **{column: 'float64' for column in [
+            "MDVP:Fo(Hz)", "MDVP:Fhi(Hz)", "MDVP:Flo(Hz)", "MDVP:Jitter(%)", "MDVP:Jitter(Abs)", "MDVP:RAP",
+            "MDVP:PPQ", "Jitter:DDP", "MDVP:Shimmer", "MDVP:Shimmer(dB)", "Shimmer:APQ3", "Shimmer:APQ5",
+            "MDVP:APQ", "Shimmer:DDA", "NHR", "HNR"]},
+        status='int8',
+        **{column: 'float64' for column in ["RPDE", "DFA", "spread1", "spread2", "D2", "PPE"]},
+    ),
+}
+
+
+def dataset_dir(disease):
+    return os.path.join(REFERENCE_DIR, disease)
+
+
+def csv_path(disease):
+    import scoring
+
+    return os.path.join(working_dir, scoring.get_spec(disease)['dataset'])
+
+
+def group_file(dtype):
+    """File of the columns of one dtype, e.g. '<U14' -> 'U14.npy'."""
+    return np.dtype(dtype).str.lstrip('<>|=') + '.npy'
+
+
+def _source_signature(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _typed_column(disease, column, values, dtype):
+    if dtype == 'str':
+        return values.astype(str).to_numpy(dtype=str)
+    typed = values.to_numpy().astype(dtype)
+    if not np.array_equal(typed, values.to_numpy()):
+        raise ValueError(f"{disease}.{column} does not fit {dtype} exactly")
+    return typed
+
+
+def typed_columns(disease, source=None):
+    """{column: array in its schema dtype} parsed from the CSV of `disease`."""
+    schema = SCHEMAS[disease]
+    source = source or csv_path(disease)
+    data = pd.read_csv(source, encoding='utf-8-sig')
+    if list(data.columns) != list(schema):
+        raise ValueError(f"{source}: columns {list(data.columns)} do not match the {disease} schema {list(schema)}")
+    if data.isna().any().any():
+        raise ValueError(f"{source}: missing values are not supported")
+    return {column: np.ascontiguousarray(_typed_column(disease, column, data[column], dtype))
+            for column, dtype in schema.items()}
+
+
+def convert(disease, source=None):
+    """Convert the CSV of `disease` into the columnar layout; returns the target directory."""
+    source = source or csv_path(disease)
+    typed = typed_columns(disease, source)
+    directory = dataset_dir(disease)
+    os.makedirs(os.path.dirname(directory), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(directory), prefix='.converting-')
+    try:
+        groups = {}
+        for column, values in typed.items():
+            groups.setdefault(group_file(values.dtype), []).append(column)
+        columns = []
+        for file, names in groups.items():
+            np.save(os.path.join(staging, file), np.stack([typed[name] for name in names]))
+            columns += [{'name': name, 'file': file, 'index': i, 'dtype': typed[name].dtype.str}
+                        for i, name in enumerate(names)]
+        order = list(typed)
+        columns.sort(key=lambda column: order.index(column['name']))  # back in CSV column order
+        meta = {'format_version': FORMAT_VERSION, 'rows': len(next(iter(typed.values()))), 'columns': columns,
+                'source': os.path.basename(source), 'source_signature': _source_signature(source)}
+        with open(os.path.join(staging, 'schema.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return directory
+
+
+def _read_schema(disease):
+    try:
+        with open(os.path.join(dataset_dir(disease), 'schema.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format_version') != FORMAT_VERSION:
+        return None
+    if meta.get('source_signature') != _source_signature(csv_path(disease)):
+        return None
+    return meta
+
+
+_columns = {}
+_lock = threading.Lock()
+
+
+def columns(disease):
+    """{column: read-only memory-mapped array} of the reference data, converting it first if needed."""
+    cached = _columns.get(disease)
+    if cached is not None:
+        return cached
+    with _lock:
+        if disease not in _columns:
+            meta = _read_schema(disease)
+            if meta is None:
+                try:
+                    convert(disease)
+                except OSError:
+                    # Read-only deployment: keep typed in-memory columns instead
+                    _columns[disease] = typed_columns(disease)
+                    return _columns[disease]
+                meta = _read_schema(disease)
+            directory = dataset_dir(disease)
+            files = {file: np.load(os.path.join(directory, file), mmap_mode='r')
+                     for file in {column['file'] for column in meta['columns']}}
+            _columns[disease] = {column['name']: files[column['file']][column['index']]
+                                 for column in meta['columns']}
+    return _columns[disease]
+
+
+def frame(disease):
+    """The reference data as a DataFrame over the memory-mapped columns (no copy)."""
+    return pd.DataFrame(columns(disease), copy=False)
+
+
+def matrix(disease, features):
+    """The `features` columns as one float64 N x F array (the only copy made)."""
+    data = columns(disease)
+    out = np.empty((len(data[features[0]]), len(features)), dtype=np.float64)
+    for j, feature in enumerate(features):
+        out[:, j] = data[feature]
+    return out
+
+
+def check(disease):
+    """Raise AssertionError unless every column equals the CSV column; returns the row count."""
+    expected = pd.read_csv(csv_path(disease), encoding='utf-8-sig')
+    actual = frame(disease)
+    for column in SCHEMAS[disease]:
+        if not (actual[column].to_numpy() == expected[column].to_numpy()).all():
+            raise AssertionError(f"{disease}.{column} differs from {csv_path(disease)}")
+    return len(actual)
+
+
+if __name__ == '__main__':
+    for disease in SCHEMAS:
+        if '--check' in sys.argv[1:]:
+            print(f"{disease}: {check(disease)} rows match the CSV")
+        else:
+            directory = convert(disease)
+            size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+            print(f"{disease}: {os.path.getsize(csv_path(disease))} bytes CSV -> {size} bytes in {directory}")
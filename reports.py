@@ -0,0 +1,206 @@
+"""PDF report engine.
+
+Renders one or many prediction reports into a single ReportLab canvas. The
+static page decoration is drawn once per document as a form XObject and
+reused on every page, long insights are word-wrapped instead of truncated,
+and content that doesn't fit (e.g. the 22 Parkinson's inputs) flows onto
+continuation pages. Each input is followed by its percentile in the
+reference population (percentiles.py). Translation functions are passed in
+so this module does not depend on streamlit.
+
+    buffer = render_report("Diabetes", inputs, diagnosis, insights, t=t, t_input=t_input)
+    buffer = render_batch(records)  # one PDF, one report per record
+"""
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+import i18n
+import percentiles
+import scoring
+
+# Display labels in model input order, keyed by the app's disease names
+INPUT_LABELS = {
+    "Diabetes": ["Pregnancies", "Glucose", "Blood Pressure", "Skin Thickness", "Insulin", "BMI",
+                 "Diabetes Pedigree Function", "Age"],
+    "Heart Disease": ["Age", "Sex", "Chest Pain types", "Resting Blood Pressure", "Serum Cholestoral",
+                      "Fasting Blood Sugar", "Resting ECG", "Maximum Heart Rate", "Exercise Induced Angina",
+                      "ST depression", "Slope of ST segment", "Major vessels", "Thalassemia"],
+    "Parkinsons": ["MDVP:Fo(Hz)", "MDVP:Fhi(Hz)", "MDVP:Flo(Hz)", "MDVP:Jitter(%)", "MDVP:Jitter(Abs)",
+                   "MDVP:RAP", "MDVP:PPQ", "Jitter:DDP", "MDVP:Shimmer", "MDVP:Shimmer(dB)", "Shimmer:APQ3",
+                   "Shimmer:APQ5", "MDVP:APQ", "Shimmer:DDA", "NHR", "HNR", "RPDE", "DFA", "spread1",
+                   "spread2", "D2", "PPE"],
+}
+
+# Translation keys of the high-risk and low-risk diagnosis messages
+DIAGNOSIS_KEYS = {
+    "Diabetes": ('risk of Diabetes.', 'You are healthy! Low risk of Diabetes.'),
+    "Heart Disease": ('risk of Heart Disease.', 'You are healthy! Low risk of Heart Disease.'),
+    "Parkinsons": ('risk of Parkinson’s Disease.', 'You are healthy! Low risk of Parkinson’s.'),
+}
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 12
+LEFT = 100
+INDENT = 120
+RIGHT_MARGIN = 72
+TOP = 750
+BOTTOM = 72
+LINE = 20
+WRAP_LINE = 15
+TEMPLATE_NAME = "page_template"
+FOOTER = "Health Assistant | Version 1.3 | For informational purposes only"
+
+
+@lru_cache(maxsize=4096)
+def wrap_text(text, width):
+    """Split `text` into lines that fit `width` points. Cached because batch
+    reports repeat the same insights and labels for every patient."""
+    return tuple(simpleSplit(text, FONT, FONT_SIZE, width)) or ('',)
+
+
+def diagnosis_text(disease, probability, high_risk, t=i18n.identity):
+    high_key, low_key = DIAGNOSIS_KEYS[disease]
+    if high_risk:
+        return f"{t('You have a')} {probability:.1f}% {t(high_key)}"
+    return f"{t(low_key)} ({probability:.1f}% {t('risk')})"
+
+
+def scored_records(disease, data, scores, insights=None, patient_column=None, t=i18n.identity):
+    """Build `render_batch` records from a batch scored with `scoring.score`.
+
+    `disease` is a scoring key ('diabetes', 'heart', 'parkinsons'), `data`
+    the scored DataFrame and `insights` an optional per-row list of insight
+    lists.
+    """
+    spec = scoring.get_spec(disease)
+    label = spec['label']
+    matrix = scoring.to_matrix(disease, data)
+    patients = data[patient_column].tolist() if patient_column else [None] * len(matrix)
+    # One vectorized lookup for the whole batch instead of one per report
+    ranks = percentiles.lookup_batch(disease, matrix).tolist()
+    records = []
+    for i, (row, probability, high_risk) in enumerate(zip(matrix.tolist(), scores['probability'].tolist(),
+                                                          scores['high_risk'].tolist())):
+        records.append({
+            'disease': label,
+            'inputs': row,
+            'percentiles': ranks[i],
+            'diagnosis': diagnosis_text(label, probability, high_risk, t),
+            'insights': insights[i] if insights is not None else (),
+            'patient': patients[i],
+        })
+    return records
+
+
+class ReportWriter:
+    """Lays out reports on a canvas, breaking pages as needed."""
+
+    def __init__(self, buffer, t=i18n.identity, t_input=i18n.identity):
+        self.t = t
+        self.t_input = t_input
+        self.canvas = canvas.Canvas(buffer, pagesize=letter, pageCompression=1)
+        self.pages = 0
+        self._define_template()
+        self.font = None
+        self.y = None
+
+    def _define_template(self):
+        c = self.canvas
+        c.beginForm(TEMPLATE_NAME)
+        c.setLineWidth(0.5)
+        c.line(LEFT, TOP + 18, PAGE_WIDTH - RIGHT_MARGIN, TOP + 18)
+        c.line(LEFT, BOTTOM - 18, PAGE_WIDTH - RIGHT_MARGIN, BOTTOM - 18)
+        c.setFont(FONT, 8)
+        c.drawString(LEFT, BOTTOM - 32, FOOTER)
+        c.endForm()
+
+    def new_page(self):
+        if self.pages:
+            self.canvas.showPage()
+        self.pages += 1
+        self.canvas.doForm(TEMPLATE_NAME)
+        self.canvas.setFont(FONT, FONT_SIZE)
+        self.font = FONT
+        self.y = TOP
+
+    def _ensure_room(self, height):
+        if self.y - height < BOTTOM:
+            self.new_page()
+
+    def line(self, text, x=LEFT, font=FONT, step=LINE):
+        self._ensure_room(step)
+        if font != self.font:
+            self.canvas.setFont(font, FONT_SIZE)
+            self.font = font
+        self.canvas.drawString(x, self.y, text)
+        self.y -= step
+
+    def paragraph(self, text, x=INDENT):
+        wrapped = wrap_text(text, PAGE_WIDTH - RIGHT_MARGIN - x)
+        for i, part in enumerate(wrapped):
+            last = i == len(wrapped) - 1
+            self.line(part, x=x, step=LINE if last else WRAP_LINE)
+
+    def report(self, disease, inputs, diagnosis, insights, generated_at=None, patient=None, model_version=None,
+               input_percentiles=None):
+        t, t_input = self.t, self.t_input
+        if input_percentiles is None:
+            input_percentiles = percentiles.lookup(scoring.LABELS[disease], inputs)
+        generated_at = generated_at or datetime.now()
+        self.new_page()
+        self.line(f"Health Assistant - {t(disease)} Prediction Report", font=FONT_BOLD)
+        if patient is not None:
+            self.line(f"Patient: {patient}")
+        self.line(f"Date: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        if model_version is not None:
+            self.line(f"{t('Model version:')} {model_version}")
+        self.line(t("Prediction Result:"), font=FONT_BOLD)
+        self.paragraph(diagnosis)
+        self.line(t("Health Insights:"), font=FONT_BOLD)
+        for insight in insights:
+            self.paragraph(insight)
+        self.y -= LINE
+        self.line(t("Inputs Provided:"), font=FONT_BOLD)
+        for label, value, percentile in zip(INPUT_LABELS[disease], inputs, input_percentiles):
+            rank = percentiles.describe(percentile, t)
+            self.paragraph(f"{t_input(label)}: {value}" + (f" ({rank})" if rank else ""))
+        self.y -= LINE
+        self.paragraph(t("Percentiles compare each value with the people in the reference dataset."), x=LEFT)
+
+    def save(self):
+        self.canvas.save()
+
+
+def render_report(disease, inputs, diagnosis, insights, t=i18n.identity, t_input=i18n.identity, model_version=None):
+    """Render one report and return it as a rewound BytesIO."""
+    return render_batch([{'disease': disease, 'inputs': inputs, 'diagnosis': diagnosis, 'insights': insights,
+                          'model_version': model_version}], t=t, t_input=t_input)
+
+
+def render_batch(records, t=i18n.identity, t_input=i18n.identity):
+    """Render every record into one PDF in a single pass.
+
+    Each record is a dict with `disease`, `inputs`, `diagnosis`, `insights`
+    and optionally `patient`, `generated_at`, `model_version` and
+    `percentiles` (looked up from the inputs when absent). Every report
+    starts on a new page.
+    """
+    buffer = BytesIO()
+    writer = ReportWriter(buffer, t=t, t_input=t_input)
+    generated_at = datetime.now()
+    for record in records:
+        writer.report(record['disease'], record['inputs'], record['diagnosis'], record.get('insights', ()),
+                      generated_at=record.get('generated_at', generated_at), patient=record.get('patient'),
+                      model_version=record.get('model_version'), input_percentiles=record.get('percentiles'))
+    if not writer.pages:
+        writer.new_page()
+    writer.save()
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,162 @@
+"""Precomputed aggregates over the prediction history.
+
+Dashboards read these small tables instead of scanning `predictions`:
+
+    daily_user   (user_id, disease, day)  -> predictions, high_risk, probability_sum
+    weekly       (disease, week)          -> predictions, high_risk, probability_sum, users
+
+`day` and `week` are UTC day numbers since the Unix epoch, `week` being the
+Monday that starts the week. The history writer (history_store.py) calls
+`apply()` in the same transaction as the INSERT of each batch, so the
+rollups never disagree with the rows they summarize and each batch costs
+one upsert per touched (user, disease, day) and (disease, week) rather than
+a re-aggregation. A database created before the rollups existed is
+backfilled once by `ensure()`.
+
+`users` counts distinct users per week: the first prediction of a user in
+a week is detected through `daily_user`, which already knows every day the
+user was seen.
+"""
+import datetime
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_user (
+    user_id TEXT NOT NULL,
+    disease TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    predictions INTEGER NOT NULL,
+    high_risk INTEGER NOT NULL,
+    probability_sum REAL NOT NULL,
+    PRIMARY KEY (user_id, disease, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS weekly (
+    disease TEXT NOT NULL,
+    week INTEGER NOT NULL,
+    predictions INTEGER NOT NULL,
+    high_risk INTEGER NOT NULL,
+    probability_sum REAL NOT NULL,
+    users INTEGER NOT NULL,
+    PRIMARY KEY (disease, week)
+) WITHOUT ROWID;
+"""
+SECONDS_PER_DAY = 86400
+
+
+def day_of(timestamp):
+    return int(timestamp // SECONDS_PER_DAY)
+
+
+def week_of(day):
+    # Day 0 (1970-01-01) was a Thursday; shift so weeks start on Monday
+    return day - (day + 3) % 7
+
+
+def date_of(day):
+    return datetime.date(1970, 1, 1) + datetime.timedelta(days=day)
+
+
+def ensure(connection):
+    """Create the rollup tables, backfilling them from `predictions` the first time."""
+    if connection.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    with connection:
+        for statement in SCHEMA.split(';'):
+            if statement.strip():
+                connection.execute(statement)
+        rebuild(connection)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def rebuild(connection):
+    """Recompute both rollups from scratch (one full scan of `predictions`)."""
+    connection.execute("DELETE FROM daily_user")
+    connection.execute("DELETE FROM weekly")
+    connection.execute(f"""
+        INSERT INTO daily_user
+        SELECT user_id, disease, CAST(created / {SECONDS_PER_DAY} AS INTEGER) AS day,
+               COUNT(*), SUM(high_risk), SUM(probability)
+        FROM predictions GROUP BY user_id, disease, day""")
+    connection.execute("""
+        INSERT INTO weekly
+        SELECT disease, day - (day + 3) % 7 AS week, SUM(predictions), SUM(high_risk), SUM(probability_sum),
+               COUNT(DISTINCT user_id)
+        FROM daily_user GROUP BY disease, week""")
+
+
+def apply(connection, rows):
+    """Fold a batch of `history_store.INSERT` parameter tuples into the rollups.
+
+    Must run inside the transaction that inserts `rows`.
+    """
+    daily = {}
+    for user_id, created, disease, probability, high_risk, _, _ in rows:
+        key = (user_id, disease, day_of(created))
+        count, high, total = daily.get(key, (0, 0, 0.0))
+        daily[key] = (count + 1, high + high_risk, total + probability)
+
+    # Users not seen earlier in the same week, checked before their new days are upserted
+    new_users = {}
+    for user_id, disease, day in {(u, d, week_of(day)) for u, d, day in daily}:
+        seen = connection.execute(
+            "SELECT 1 FROM daily_user WHERE user_id = ? AND disease = ? AND day >= ? AND day < ? LIMIT 1",
+            (user_id, disease, day, day + 7)).fetchone()
+        if seen is None:
+            new_users[(disease, day)] = new_users.get((disease, day), 0) + 1
+
+    connection.executemany("""
+        INSERT INTO daily_user VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, disease, day) DO UPDATE SET
+            predictions = predictions + excluded.predictions,
+            high_risk = high_risk + excluded.high_risk,
+            probability_sum = probability_sum + excluded.probability_sum""",
+        [key + value for key, value in daily.items()])
+
+    weekly = {}
+    for (user_id, disease, day), (count, high, total) in daily.items():
+        key = (disease, week_of(day))
+        w_count, w_high, w_total = weekly.get(key, (0, 0, 0.0))
+        weekly[key] = (w_count + count, w_high + high, w_total + total)
+    connection.executemany("""
+        INSERT INTO weekly VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (disease, week) DO UPDATE SET
+            predictions = predictions + excluded.predictions,
+            high_risk = high_risk + excluded.high_risk,
+            probability_sum = probability_sum + excluded.probability_sum,
+            users = users + excluded.users""",
+        [key + value + (new_users.get(key, 0),) for key, value in weekly.items()])
+
+
+def weekly_cohort(connection, disease=None, weeks=12):
+    """Latest `weeks` weeks, oldest first: dicts with week (date), disease, predictions,
+    high_risk_share (%), mean_probability (%) and users."""
+    query = ("SELECT disease, week, predictions, high_risk, probability_sum, users FROM weekly "
+             "WHERE week > (SELECT MAX(week) FROM weekly) - ?")
+    params = [7 * weeks]
+    if disease is not None:
+        query += " AND disease = ?"
+        params.append(disease)
+    rows = connection.execute(query + " ORDER BY week", params).fetchall()
+    return [{
+        'week': date_of(week),
+        'disease': disease_,
+        'predictions': count,
+        'high_risk_share': 100.0 * high / count,
+        'mean_probability': total / count,
+        'users': users,
+    } for disease_, week, count, high, total, users in rows]
+
+
+def user_trend(connection, user_id, days=90, today=None):
+    """Daily mean risk of `user_id` per disease over the last `days` days, oldest first."""
+    today = day_of(datetime.datetime.now(datetime.timezone.utc).timestamp()) if today is None else today
+    rows = connection.execute("""
+        SELECT disease, day, predictions, high_risk, probability_sum FROM daily_user
+        WHERE user_id = ? AND day > ? ORDER BY day""", (str(user_id), today - days)).fetchall()
+    return [{
+        'day': date_of(day),
+        'disease': disease,
+        'predictions': count,
+        'high_risk': high,
+        'mean_probability': total / count,
+    } for disease, day, count, high, total in rows]
@@ -0,0 +1,253 @@
+"""Stream a CSV through one of the disease models and write the scores.
+
+The input must use the column layout of the bundled CSVs (`diabetes.csv`,
+`heart_disease_data.csv` or `parkinsons.csv`); extra columns such as `name`,
+`status`, `Outcome` or `target` are carried through untouched. The file is
+read in fixed-size chunks so memory stays bounded by `--chunksize` rather
+than by the size of the input.
+
+    python score_csv.py diabetes patients.csv scored.csv
+    python score_csv.py parkinsons extract.csv scored.parquet --chunksize 200000
+    python score_csv.py heart patients.csv scored.csv --insights
+    python score_csv.py diabetes population.csv scored.csv --workers 8
+
+With `--workers`, the file is split into byte ranges on line boundaries and
+each range is parsed, scored and formatted in a separate process, so the
+parent only concatenates output in input order. Inputs must then not contain
+quoted newlines (the bundled layouts never do).
+"""
+import argparse
+import io
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+import insight_rules
+import scoring
+
+SCORE_COLUMNS = ['decision_score', 'probability', 'high_risk']
+
+
+def score_chunk(disease, chunk, entry=None, insights=False):
+    """Score one chunk, leaving rows with missing, non-numeric or non-finite inputs as NaN.
+
+    `entry` is the `scoring.load_entry` pair to score with (the served model
+    by default). With `insights`, an `insights` column lists the insight
+    keys of each row separated by ';'.
+    """
+    # Unparseable cells become NaN so only their rows are skipped, not the whole file
+    features = chunk.rename(columns=lambda c: str(c).lstrip('\ufeff'))
+    features = features[[c for c in scoring.get_spec(disease)['features'] if c in features.columns]]
+    matrix = scoring.to_matrix(disease, features.apply(pd.to_numeric, errors='coerce'))
+    valid = np.isfinite(matrix).all(axis=1)
+    scores = pd.DataFrame({
+        'decision_score': np.full(len(chunk), np.nan),
+        'probability': np.full(len(chunk), np.nan),
+        'high_risk': pd.array([pd.NA] * len(chunk), dtype='boolean'),
+    }, index=chunk.index)
+    if insights:
+        scores['insights'] = None
+    if valid.any():
+        model, artifact = entry or scoring.load_entry(disease)
+        result = scoring.score(disease, matrix[valid], model=model, model_sha256=artifact.manifest['sha256'])
+        scores.loc[valid, 'decision_score'] = result['decision_score'].to_numpy()
+        scores.loc[valid, 'probability'] = result['probability'].to_numpy()
+        scores.loc[valid, 'high_risk'] = result['high_risk'].to_numpy()
+        if insights:
+            keys = insight_rules.batch_insights(disease, matrix[valid], result['insight_flag'].to_numpy())
+            scores.loc[valid, 'insights'] = [';'.join(row) for row in keys]
+    return scores
+
+
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+        self.first = True
+
+    def write(self, frame):
+        frame.to_csv(self.path, mode='w' if self.first else 'a', header=self.first, index=False)
+        self.first = False
+
+    def write_encoded(self, columns, text):
+        """Append rows already formatted by `encode_frame`."""
+        if self.first:
+            pd.DataFrame(columns=columns).to_csv(self.path, index=False)
+            self.first = False
+        with open(self.path, 'a', newline='') as f:
+            f.write(text)
+
+    def close(self):
+        if self.first:
+            pd.DataFrame(columns=SCORE_COLUMNS).to_csv(self.path, index=False)
+
+
+class ParquetSink:
+    """Writes every chunk with the first chunk's schema.
+
+    `numeric_columns` (the model features) are written as float64 in every
+    chunk, so a chunk whose carried-through input has a non-numeric cell
+    (scored as NaN) or a missing value does not infer a different type.
+    """
+
+    def __init__(self, path, numeric_columns=()):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Parquet output requires pyarrow: pip install pyarrow")
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.numeric_columns = list(numeric_columns)
+        self.writer = None
+
+    def write(self, frame):
+        numeric = [c for c in self.numeric_columns if c in frame.columns]
+        if numeric:
+            frame = frame.assign(**{c: pd.to_numeric(frame[c], errors='coerce').astype('float64') for c in numeric})
+        if self.writer is None:
+            table = self.pa.Table.from_pandas(frame, preserve_index=False)
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        else:
+            # Later chunks may infer narrower dtypes; pin them to the first chunk's schema
+            table = self.pa.Table.from_pandas(frame, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def write_encoded(self, columns, frame):
+        self.write(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_sink(path, disease=None):
+    if path.lower().endswith(('.parquet', '.pq')):
+        return ParquetSink(path, scoring.get_spec(disease)['features'] if disease else ())
+    return CsvSink(path)
+
+
+def score_csv(disease, input_path, output_path, chunksize=100_000, scores_only=False, insights=False, workers=1):
+    """Score `input_path` chunk by chunk into `output_path`; returns the row count."""
+    if workers > 1:
+        return score_csv_sharded(disease, input_path, output_path, workers, chunksize=chunksize,
+                                 scores_only=scores_only, insights=insights)
+    entry = scoring.load_entry(disease)
+    sink = open_sink(output_path, disease)
+    rows = 0
+    try:
+        # utf-8-sig strips the BOM in front of `age` in heart_disease_data.csv
+        for chunk in pd.read_csv(input_path, chunksize=chunksize, encoding='utf-8-sig'):
+            scores = score_chunk(disease, chunk, entry=entry, insights=insights)
+            sink.write(scores if scores_only else pd.concat([chunk, scores], axis=1))
+            rows += len(chunk)
+    finally:
+        sink.close()
+    return rows
+
+
+# ------------------------------------------------
+# 🧵 Sharded Scoring
+# ------------------------------------------------
+_worker_entry = None
+
+
+def _init_worker(disease):
+    global _worker_entry
+    # Compiled models are memory-mapped, so every worker shares the same pages
+    _worker_entry = scoring.load_entry(disease)
+
+
+def _average_row_bytes(path, sample=1 << 16):
+    with open(path, 'rb') as f:
+        f.readline()
+        lines = f.read(sample).count(b'\n')
+    return max(sample // max(lines, 1), 1)
+
+
+def shard_ranges(path, shard_bytes):
+    """Byte ranges covering everything after the header, each ending on a line boundary."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + shard_bytes, size))
+            f.readline()  # run on to the end of the line
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def encode_frame(frame, fmt):
+    """What a worker sends back: CSV text without header, or the frame itself for Parquet."""
+    return frame.to_csv(index=False, header=False) if fmt == 'csv' else frame
+
+
+def _score_shard(disease, path, columns, fmt, scores_only, insights, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    chunk = pd.read_csv(io.BytesIO(data), header=None, names=columns)
+    scores = score_chunk(disease, chunk, entry=_worker_entry, insights=insights)
+    frame = scores if scores_only else pd.concat([chunk, scores], axis=1)
+    return len(frame), list(frame.columns), encode_frame(frame, fmt)
+
+
+def ordered_results(pool, fn, ranges, window):
+    """Yield `fn(*range)` results in input order with at most `window` shards in flight."""
+    pending = deque()
+    for start, end in ranges:
+        pending.append(pool.submit(fn, start, end))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def score_csv_sharded(disease, input_path, output_path, workers, chunksize=100_000, scores_only=False,
+                      insights=False):
+    """`score_csv` across a pool of `workers` processes, each handling ~`chunksize` rows at a time."""
+    columns = pd.read_csv(input_path, nrows=0, encoding='utf-8-sig').columns.tolist()
+    # Compile in the parent first so workers only memory-map the compiled files
+    scoring.load_model(disease)
+    ranges = shard_ranges(input_path, chunksize * _average_row_bytes(input_path))
+    sink = open_sink(output_path, disease)
+    fmt = 'parquet' if isinstance(sink, ParquetSink) else 'csv'
+    shard = partial(_score_shard, disease, input_path, columns, fmt, scores_only, insights)
+    rows = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(disease,)) as pool:
+            for count, out_columns, payload in ordered_results(pool, shard, ranges, window=2 * workers):
+                sink.write_encoded(out_columns, payload)
+                rows += count
+    finally:
+        sink.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV with one of the saved disease models.")
+    parser.add_argument('disease', choices=sorted(scoring.DISEASES))
+    parser.add_argument('input', help="CSV in the same column layout as the bundled dataset")
+    parser.add_argument('output', help="output path; a .parquet suffix writes Parquet, anything else CSV")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="rows held in memory at a time")
+    parser.add_argument('--scores-only', action='store_true', help="write only the score columns")
+    parser.add_argument('--insights', action='store_true', help="add the health insight keys of each row")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="score in this many processes (0 = one per CPU core)")
+    args = parser.parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+    rows = score_csv(args.disease, args.input, args.output, chunksize=args.chunksize, scores_only=args.scores_only,
+                     insights=args.insights, workers=workers)
+    print(f"Scored {rows} rows -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
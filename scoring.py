@@ -0,0 +1,457 @@
+"""Headless, vectorized scoring for the three disease models.
+
+This module deliberately does not import streamlit so it can be used from
+batch jobs and scripts. Every function accepts an N x F array (or a
+DataFrame in the column layout of the bundled CSVs) and scores all rows
+in a single call.
+"""
+import json
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import calibration
+import compiled_model
+import metrics
+import model_registry
+import reference_data
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.environ.get('HEALTH_MODEL_DIR', os.path.join(working_dir, 'saved models'))
+
+# ------------------------------------------------
+# 📋 Disease Specifications
+# ------------------------------------------------
+# `features` follows the column order of the bundled CSVs (`dataset`, with the
+# label in `target`), which is also the order the models were trained on.
+# `ranges` is the (min, max) the app's number inputs accept for each feature.
+# Thresholds are calibrated risk percentages: `threshold` drives the
+# diagnosis message and `insight_threshold` the high/low risk insight;
+# `max_probability` optionally caps the reported risk. The values below are
+# defaults, overridden per disease by the thresholds config (THRESHOLDS_FILE).
+DISEASES = {
+    'diabetes': {
+        'label': "Diabetes",
+        'model_file': 'diabetes_model.sav',
+        'dataset': 'diabetes.csv',
+        'target': 'Outcome',
+        'features': ["Pregnancies", "Glucose", "BloodPressure", "SkinThickness", "Insulin", "BMI",
+                     "DiabetesPedigreeFunction", "Age"],
+        'ranges': {"Pregnancies": (0, 20), "Glucose": (0, 300), "BloodPressure": (0, 200), "SkinThickness": (0, 100),
+                   "Insulin": (0, 900), "BMI": (0.0, 70.0), "DiabetesPedigreeFunction": (0.0, 2.5), "Age": (0, 80)},
+        'threshold': 50,
+        'insight_threshold': 50,
+        'max_probability': None,
+    },
+    'heart': {
+        'label': "Heart Disease",
+        'model_file': 'heart_disease_model.sav',
+        'dataset': 'heart_disease_data.csv',
+        'target': 'target',
+        'features': ["age", "sex", "cp", "trestbps", "chol", "fbs", "restecg", "thalach", "exang",
+                     "oldpeak", "slope", "ca", "thal"],
+        'ranges': {"age": (0, 80), "sex": (0, 1), "cp": (0, 3), "trestbps": (0, 200), "chol": (0, 600), "fbs": (0, 1),
+                   "restecg": (0, 2), "thalach": (0, 250), "exang": (0, 1), "oldpeak": (0.0, 6.0), "slope": (0, 2),
+                   "ca": (0, 3), "thal": (0, 3)},
+        'threshold': 50,
+        'insight_threshold': 50,
+        'max_probability': None,
+    },
+    'parkinsons': {
+        'label': "Parkinsons",
+        'model_file': 'parkinson_model.sav',
+        'dataset': 'parkinsons.csv',
+        'target': 'status',
+        'features': ["MDVP:Fo(Hz)", "MDVP:Fhi(Hz)", "MDVP:Flo(Hz)", "MDVP:Jitter(%)", "MDVP:Jitter(Abs)",
+                     "MDVP:RAP", "MDVP:PPQ", "Jitter:DDP", "MDVP:Shimmer", "MDVP:Shimmer(dB)",
+                     "Shimmer:APQ3", "Shimmer:APQ5", "MDVP:APQ", "Shimmer:DDA", "NHR", "HNR", "RPDE",
+                     "DFA", "spread1", "spread2", "D2", "PPE"],
+        'ranges': {"MDVP:Fo(Hz)": (0.0, 1000.0), "MDVP:Fhi(Hz)": (0.0, 1000.0), "MDVP:Flo(Hz)": (0.0, 1000.0),
+                   "MDVP:Jitter(%)": (0.0, 10.0), "MDVP:Jitter(Abs)": (0.0, 0.1), "MDVP:RAP": (0.0, 0.1),
+                   "MDVP:PPQ": (0.0, 0.1), "Jitter:DDP": (0.0, 0.1), "MDVP:Shimmer": (0.0, 10.0),
+                   "MDVP:Shimmer(dB)": (0.0, 5.0), "Shimmer:APQ3": (0.0, 0.1), "Shimmer:APQ5": (0.0, 0.1),
+                   "MDVP:APQ": (0.0, 0.1), "Shimmer:DDA": (0.0, 0.1), "NHR": (0.0, 0.5), "HNR": (0.0, 50.0),
+                   "RPDE": (0.0, 1.0), "DFA": (0.0, 1.0), "spread1": (0.0, 1.0), "spread2": (0.0, 1.0),
+                   "D2": (0.0, 5.0), "PPE": (0.0, 1.0)},
+        'threshold': 50,
+        'insight_threshold': 50,
+        'max_probability': None,
+    },
+}
+
+# App display name -> disease key, e.g. "Heart Disease" -> 'heart'
+LABELS = {spec['label']: disease for disease, spec in DISEASES.items()}
+
+THRESHOLDS_FILE = os.environ.get('HEALTH_THRESHOLDS_FILE', os.path.join(working_dir, 'thresholds.json'))
+THRESHOLD_KEYS = ('threshold', 'insight_threshold', 'max_probability')
+
+
+def load_threshold_config(path=THRESHOLDS_FILE):
+    """Apply `{disease: {threshold, insight_threshold, max_probability}}` from a JSON file."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return
+    for disease, values in config.items():
+        unknown = set(values) - set(THRESHOLD_KEYS)
+        if disease not in DISEASES or unknown:
+            raise ValueError(f"{path}: unknown disease {disease!r} or keys {sorted(unknown)}")
+        DISEASES[disease].update(values)
+
+
+load_threshold_config()
+
+
+def get_spec(disease):
+    if disease not in DISEASES:
+        raise KeyError(f"Unknown disease {disease!r}, expected one of {sorted(DISEASES)}")
+    return DISEASES[disease]
+
+
+def load_dataset(disease):
+    """The bundled reference data of `disease`, memory-mapped from its typed
+    columnar copy (see reference_data.py) rather than parsed from the CSV."""
+    return reference_data.frame(disease)
+
+# ------------------------------------------------
+# ⚙️ Model Loading
+# ------------------------------------------------
+# Models are loaded lazily on first use from the active artifact in the model
+# registry (model_registry.py), or the `.sav` in MODEL_DIR if a disease has
+# no registry entry. The artifact's checksum is verified on every load. When
+# a compiled copy (see compiled_model.py) matching that checksum exists it is
+# memory-mapped instead of unpickled; otherwise the pickle is loaded and
+# compiled on the way so the next process starts from the fast format.
+COMPILED_DIR = os.path.join(MODEL_DIR, 'compiled')
+USE_COMPILED = os.environ.get('HEALTH_COMPILED_MODELS', '1') != '0'
+
+# disease -> (model, artifact). Replaced as a whole on reload, so a reader
+# always gets a matching model and version without taking a lock.
+_active = {}
+_load_locks = {disease: threading.Lock() for disease in DISEASES}
+
+
+def legacy_model_path(disease):
+    return os.path.join(MODEL_DIR, get_spec(disease)['model_file'])
+
+
+def artifact(disease):
+    """The active model_registry.Artifact for `disease`."""
+    return model_registry.resolve(disease, legacy_model_path(disease))
+
+
+def model_path(disease):
+    return artifact(disease).path
+
+
+def compiled_dir(disease):
+    return os.path.join(COMPILED_DIR, disease)
+
+
+def load_pickled(disease, path=None):
+    with open(path or model_path(disease), 'rb') as f:
+        return pickle.load(f)
+
+
+def compile_model(disease, path=None, sha256=None):
+    """Unpickle `disease` and (re)write its compiled copy. Returns the model to score with."""
+    path = path or model_path(disease)
+    bundle = load_pickled(disease, path)
+    try:
+        compiled = compiled_model.compile_bundle(bundle)
+    except ValueError:
+        return bundle
+    try:
+        compiled_model.save_compiled(compiled, compiled_dir(disease),
+                                     source_sha256=sha256 or compiled_model.file_sha256(path))
+    except OSError:
+        pass  # read-only deployment: keep the in-memory compiled model
+    return compiled
+
+
+def _check_sklearn_version(current):
+    """Report a pickle about to be loaded under another scikit-learn than it was published with."""
+    published = current.manifest.get('sklearn_version')
+    if published is None:
+        return
+    import sklearn
+
+    if sklearn.__version__ != published:
+        print(f"{current.disease} {current.version} was published with scikit-learn {published}, "
+              f"loading it with {sklearn.__version__}; republish it if its scores look wrong.")
+
+
+def _load(disease):
+    current = artifact(disease)
+    sha256 = model_registry.verify(current)
+    features = current.manifest.get('features')
+    if features is not None and features != get_spec(disease)['features']:
+        raise ValueError(f"{disease} {current.version} was published for features {features}")
+    if not USE_COMPILED:
+        _check_sklearn_version(current)
+        return load_pickled(disease, current.path), current
+    compiled = compiled_model.load_compiled(compiled_dir(disease), source_sha256=sha256)
+    if compiled is None:
+        _check_sklearn_version(current)
+        compiled = compile_model(disease, current.path, sha256)
+    schema = getattr(compiled, 'features', None)
+    if schema is not None and schema != get_spec(disease)['features']:
+        raise ValueError(f"{disease} {current.version} was fitted on features {schema}")
+    return compiled, current
+
+
+def _active_entry(disease):
+    get_spec(disease)
+    entry = _active.get(disease)
+    if entry is None:
+        with _load_locks[disease]:
+            entry = _active.get(disease)
+            if entry is None:
+                with metrics.timer('model_load', disease):
+                    entry = _active[disease] = _load(disease)
+    return entry
+
+
+def load_model(disease):
+    """Return the model for `disease`, loading it on first use (cached per process)."""
+    return _active_entry(disease)[0]
+
+
+def load_entry(disease):
+    """(model, model_registry.Artifact) of the served model, read together.
+
+    Pass the artifact's `manifest['sha256']` on to `probabilities_from_scores`
+    (or the entry to `predict_one`) so scores are calibrated for the model
+    that produced them even if a reload swaps models in between.
+    """
+    return _active_entry(disease)
+
+
+def load_model_version(disease):
+    """(model, version) of the served model, read together so they always match."""
+    model, current = _active_entry(disease)
+    return model, current.version
+
+
+def loaded_model(disease):
+    """The model for `disease` if it is already loaded, else None (never loads)."""
+    entry = _active.get(disease)
+    return entry[0] if entry is not None else None
+
+
+def model_version(disease):
+    """Version of the loaded model, or None if it isn't loaded yet."""
+    entry = _active.get(disease)
+    return entry[1].version if entry is not None else None
+
+
+def calibration_identity(disease, artifact=None):
+    """Fingerprint of the probability mapping of `artifact`, by default the
+    served one (see calibration.identity)."""
+    artifact = artifact or _active_entry(disease)[1]
+    return calibration.identity(disease, artifact.manifest['sha256'])
+
+
+def unload_model(disease):
+    """Forget the loaded model so the next `load_model` reads it from disk again."""
+    with _load_locks[disease]:
+        _active.pop(disease, None)
+
+
+def warm_models(diseases=None):
+    """Load several models concurrently; returns {disease: model}."""
+    diseases = list(diseases or DISEASES)
+    with ThreadPoolExecutor(max_workers=len(diseases)) as pool:
+        return dict(zip(diseases, pool.map(load_model, diseases)))
+
+# ------------------------------------------------
+# 🔄 Hot Reload
+# ------------------------------------------------
+# A background thread polls the registry pointer (or the legacy file's
+# mtime/size) of every loaded model. A changed artifact is loaded and
+# compiled on that thread and swapped in with a single dict assignment, so
+# predictions never wait for a reload and in-flight ones finish on the model
+# they started with. A broken artifact (bad checksum, wrong features) is
+# reported once and the current model keeps serving. Calibrations refitted
+# in place are reloaded on the same poll.
+RELOAD_INTERVAL = float(os.environ.get('HEALTH_MODEL_RELOAD_INTERVAL', '5'))
+
+_failed_signatures = {}
+_reloader_started = False
+_reloader_lock = threading.Lock()
+
+
+def reload_model(disease):
+    """Swap in the active artifact of `disease` if it changed; returns True if swapped."""
+    entry = _active.get(disease)
+    if entry is None:
+        return False
+    try:
+        signature = model_registry.signature(disease, legacy_model_path(disease))
+    except OSError as e:  # e.g. a CURRENT pointer this user may not read
+        signature = ('unreadable', str(e))
+        if signature != _failed_signatures.get(disease):
+            _failed_signatures[disease] = signature
+            print(f"Model reload failed for {disease}, still serving {entry[1].version}: {e}")
+        return False
+    if signature == entry[1].signature or signature == _failed_signatures.get(disease):
+        return False
+    try:
+        with metrics.timer('model_reload', disease):
+            new_entry = _load(disease)
+    except Exception as e:
+        _failed_signatures[disease] = signature
+        print(f"Model reload failed for {disease}, still serving {entry[1].version}: {e}")
+        return False
+    _active[disease] = new_entry
+    _failed_signatures.pop(disease, None)
+    print(f"Model {disease}: {entry[1].version} -> {new_entry[1].version}")
+    return True
+
+
+def start_reloader(interval=RELOAD_INTERVAL):
+    """Poll for new model versions on a daemon thread, at most once per process."""
+    global _reloader_started
+    if interval <= 0:
+        return False
+    with _reloader_lock:
+        if _reloader_started:
+            return False
+        _reloader_started = True
+
+    def poll():
+        while True:
+            time.sleep(interval)
+            for disease in list(_active):
+                reload_model(disease)
+            calibration.refresh()
+
+    threading.Thread(target=poll, name='model-reloader', daemon=True).start()
+    return True
+
+# ------------------------------------------------
+# 🧮 Vectorized Scoring
+# ------------------------------------------------
+def to_matrix(disease, data):
+    """Return `data` as a float64 N x F matrix in the model's feature order.
+
+    DataFrames are matched by column name (a BOM prefix, as in
+    `heart_disease_data.csv`, is ignored) so extra columns such as `name`,
+    `status`, `Outcome` or `target` are dropped. Anything else is treated as
+    positional and a single row may be passed as a flat sequence.
+    """
+    features = get_spec(disease)['features']
+    if isinstance(data, pd.DataFrame):
+        data = data.rename(columns=lambda c: str(c).lstrip('\ufeff'))
+        missing = [c for c in features if c not in data.columns]
+        if missing:
+            raise ValueError(f"Missing columns for {disease}: {missing}")
+        data = data[features].to_numpy(dtype=np.float64)
+    matrix = np.asarray(data, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2 or matrix.shape[1] != len(features):
+        raise ValueError(f"Expected an N x {len(features)} array for {disease}, got shape {matrix.shape}")
+    return matrix
+
+
+def decision_scores(disease, data, model=None):
+    """Raw `decision_function` scores for every row of `data`."""
+    if model is None:
+        model = load_model(disease)
+    matrix = to_matrix(disease, data)
+    with metrics.timer('decision_function', disease):
+        return _decision_function(model, matrix)
+
+
+def _decision_function(model, matrix):
+    if isinstance(model, compiled_model.CompiledModel):
+        return model.decision_function(matrix)
+    if isinstance(model, dict):
+        # Saved bundles are {'model': estimator, 'scaler': StandardScaler}; the
+        # scaler was fitted on a DataFrame so give it matching feature names.
+        scaler = model.get('scaler')
+        if scaler is not None:
+            frame = pd.DataFrame(matrix, columns=scaler.feature_names_in_)
+            matrix = scaler.transform(frame)
+        model = model['model']
+    return np.asarray(model.decision_function(matrix), dtype=np.float64).reshape(-1)
+
+
+def sigmoid(scores):
+    # exp(-logaddexp(0, -x)) == 1 / (1 + exp(-x)) without overflow warnings
+    return np.exp(-np.logaddexp(0.0, -np.asarray(scores, dtype=np.float64)))
+
+
+def probabilities_from_scores(disease, scores, model_sha256=None):
+    """Convert decision scores to the risk percentages shown in the app.
+
+    Uses the calibration fitted for the model with artifact checksum
+    `model_sha256` (see calibration.py), or the logistic sigmoid if there is
+    none. Without `model_sha256` that is the served model, which is only
+    right for scores it produced itself.
+    """
+    with metrics.timer('probability', disease):
+        calibrator = calibration.for_model(disease, model_sha256 or _active_entry(disease)[1].manifest['sha256'])
+        probability = (calibrator(scores) if calibrator is not None else sigmoid(scores)) * 100
+        max_probability = get_spec(disease)['max_probability']
+        if max_probability is not None:
+            probability = np.minimum(probability, max_probability)
+    return probability
+
+
+def score(disease, data, model=None, model_sha256=None):
+    """Score a batch of patients in one call.
+
+    Returns a DataFrame with one row per input row and the columns
+    `decision_score`, `probability` (percent), `high_risk` (diagnosis at the
+    page threshold) and `insight_flag` (high/low risk used for insights).
+    With an explicit `model`, pass its `model_sha256` (see `load_entry`).
+    """
+    spec = get_spec(disease)
+    if model is None:
+        model, artifact = load_entry(disease)
+        model_sha256 = artifact.manifest['sha256']
+    scores = decision_scores(disease, data, model=model)
+    probability = probabilities_from_scores(disease, scores, model_sha256)
+    index = data.index if isinstance(data, pd.DataFrame) else None
+    return pd.DataFrame({
+        'decision_score': scores,
+        'probability': probability,
+        'high_risk': probability >= spec['threshold'],
+        'insight_flag': (probability >= spec['insight_threshold']).astype(np.int8),
+    }, index=index)
+
+
+def predict_one(disease, values, model=None, entry=None):
+    """Score a single patient and return plain Python values for the UI.
+
+    Skips the DataFrame assembly of `score`; compiled models score the row in
+    preallocated buffers without building any arrays. `entry` is a
+    `load_entry` result to score with, the served model by default.
+    `model_version` is None when a bare `model` is passed in.
+    """
+    spec = get_spec(disease)
+    version = model_sha256 = None
+    if model is None:
+        model, artifact = entry or load_entry(disease)
+        version, model_sha256 = artifact.version, artifact.manifest['sha256']
+    if isinstance(model, compiled_model.CompiledModel):
+        with metrics.timer('decision_function', disease):
+            decision_score = model.decision_one(values)
+    else:
+        decision_score = float(decision_scores(disease, values, model=model)[0])
+    probability = float(probabilities_from_scores(disease, decision_score, model_sha256))
+    return {
+        'decision_score': decision_score,
+        'probability': probability,
+        'high_risk': probability >= spec['threshold'],
+        'insight_flag': int(probability >= spec['insight_threshold']),
+        'model_version': version,
+    }
@@ -0,0 +1,159 @@
+"""Combined screening: one patient record, all three models.
+
+A record is a flat dict keyed by model feature name. Fields that several
+models share are entered once under one name (`SHARED_FIELDS`, currently
+Age). The record is split per model, the models run on a shared thread pool
+when that is faster (see `_use_pool`), and the results are merged into one
+dict with one PDF:
+
+    result = screen(record)
+    result['results']['heart']['probability']
+    pdf = screening_report(result).getvalue()
+
+Only fields that measure the same thing are shared. The diabetes model's
+BloodPressure is diastolic pressure and the heart model's trestbps is resting
+systolic pressure, so both are asked for separately. BMI is an input to the
+diabetes model only.
+
+    python screening.py patient.json [--pdf screening.pdf]
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import compiled_model
+import i18n
+import insight_rules
+import metrics
+import reports
+import scoring
+
+# Record key -> the feature it fills in each model
+SHARED_FIELDS = {
+    'Age': {'diabetes': 'Age', 'heart': 'age'},
+}
+
+
+def _record_keys():
+    keys = {}
+    for disease, spec in scoring.DISEASES.items():
+        shared = {feature: name for name, features in SHARED_FIELDS.items()
+                  for d, feature in features.items() if d == disease}
+        keys[disease] = [shared.get(feature, feature) for feature in spec['features']]
+    return keys
+
+
+# Disease -> record key of each model feature, in model order
+RECORD_KEYS = _record_keys()
+# Every record field, each shared field once
+FIELDS = list(dict.fromkeys(key for keys in RECORD_KEYS.values() for key in keys))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=len(scoring.DISEASES), thread_name_prefix='screening')
+    return _executor
+
+
+def split_record(record, diseases=None):
+    """{disease: input values in model order} from one patient record."""
+    diseases = list(diseases or scoring.DISEASES)
+    missing = sorted({key for disease in diseases for key in RECORD_KEYS[disease] if key not in record})
+    if missing:
+        raise ValueError(f"Missing fields: {missing}")
+    inputs = {}
+    for disease in diseases:
+        values = [float(record[key]) for key in RECORD_KEYS[disease]]
+        if not all(math.isfinite(v) for v in values):
+            raise ValueError(f"Invalid {disease} inputs: values must be finite numbers")
+        inputs[disease] = values
+    return inputs
+
+
+def _use_pool(diseases, service):
+    """Whether running the models concurrently beats running them in turn.
+
+    Single-row scoring is mostly Python-level validation that holds the GIL,
+    so loaded models run faster in turn. Threads pay off while models are
+    still loading (file I/O) and when a service queues pickled estimators on
+    micro-batchers (the batch windows overlap).
+    """
+    models = [scoring.loaded_model(disease) for disease in diseases]
+    if any(model is None for model in models):
+        return True
+    return service is not None and service.max_wait > 0 and \
+        not all(isinstance(model, compiled_model.CompiledModel) for model in models)
+
+
+def _screen_one(disease, values, predict, t, t_insight):
+    result = dict(predict(disease, values))
+    label = scoring.get_spec(disease)['label']
+    result['label'] = label
+    result['inputs'] = values
+    result['diagnosis'] = reports.diagnosis_text(label, result['probability'], result['high_risk'], t)
+    result['insights'] = insight_rules.health_insights(disease, values, result['insight_flag'], t=t_insight)
+    return result
+
+
+def screen(record, diseases=None, service=None, t=i18n.identity, t_insight=i18n.identity):
+    """Score one patient with every model and merge the results.
+
+    `service` is an optional `InferenceService`, so screening shares its
+    prediction cache and batching; otherwise `scoring.predict_one` is used.
+    Returns {'results': {disease: result}, 'high_risk': [diseases],
+    'elapsed': seconds}; each result is a `predict_one` dict plus `label`,
+    `inputs`, `diagnosis` and `insights`.
+    """
+    inputs = split_record(record, diseases)
+    predict = service.predict if service is not None else scoring.predict_one
+    start = time.perf_counter()
+    with metrics.timer('screening'):
+        if _use_pool(inputs, service):
+            futures = {d: executor().submit(_screen_one, d, values, predict, t, t_insight)
+                       for d, values in inputs.items()}
+            results = {d: future.result() for d, future in futures.items()}
+        else:
+            results = {d: _screen_one(d, values, predict, t, t_insight) for d, values in inputs.items()}
+    return {
+        'results': results,
+        'high_risk': [d for d, result in results.items() if result['high_risk']],
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def screening_records(result):
+    """`reports.render_batch` records, one per screened disease."""
+    return [{'disease': r['label'], 'inputs': r['inputs'], 'diagnosis': r['diagnosis'], 'insights': r['insights'],
+             'model_version': r.get('model_version')} for r in result['results'].values()]
+
+
+def screening_report(result, t=i18n.identity, t_input=i18n.identity):
+    """One PDF with a report page per disease, as a rewound BytesIO."""
+    return reports.render_batch(screening_records(result), t=t, t_input=t_input)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen one patient record with all disease models.")
+    parser.add_argument('record', help=f"JSON object with the fields {', '.join(FIELDS)}")
+    parser.add_argument('--pdf', help="also write the combined report to this path")
+    args = parser.parse_args(argv)
+    with open(args.record, encoding='utf-8') as f:
+        record = json.load(f)
+    result = screen(record)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.pdf:
+        with open(args.pdf, 'wb') as f:
+            f.write(screening_report(result).getvalue())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Compiled models must score exactly like the pickled estimators.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compiled_model  # noqa: E402
+import scoring  # noqa: E402
+
+
+@pytest.mark.parametrize('disease', scoring.DISEASES)
+def test_parity(disease):
+    assert compiled_model.check_parity(disease) <= 1e-9
+
+
+@pytest.mark.parametrize('disease', scoring.DISEASES)
+def test_save_and_load(disease, tmp_path):
+    compiled = compiled_model.compile_bundle(scoring.load_pickled(disease))
+    directory = str(tmp_path / disease)
+    compiled_model.save_compiled(compiled, directory, source_sha256='a')
+    compiled_model.save_compiled(compiled, directory, source_sha256='b')
+
+    assert compiled_model.load_compiled(directory, source_sha256='a') is None
+    loaded = compiled_model.load_compiled(directory, source_sha256='b')
+    matrix = scoring.to_matrix(disease, scoring.load_dataset(disease))
+    np.testing.assert_array_equal(loaded.decision_function(matrix), compiled.decision_function(matrix))
+    assert sorted(os.listdir(directory)) == [compiled_model.CURRENT_NAME, os.path.basename(
+        compiled_model.current_build(directory))]
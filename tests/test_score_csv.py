@@ -0,0 +1,43 @@
+"""score_csv skips rows it cannot score without losing the rest of the file."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import score_csv  # noqa: E402
+
+
+@pytest.fixture
+def bad_cell_csv(tmp_path):
+    """The first 10 rows of diabetes.csv with a non-numeric Glucose in row 3."""
+    data = pd.read_csv(os.path.join(ROOT, 'diabetes.csv'), nrows=10).astype({'Glucose': object})
+    data.loc[2, 'Glucose'] = 'abc'
+    path = tmp_path / 'bad.csv'
+    data.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parquet_chunk_with_bad_cell(bad_cell_csv, tmp_path, workers):
+    pytest.importorskip('pyarrow')
+    output = str(tmp_path / 'scored.parquet')
+    rows = score_csv.score_csv('diabetes', bad_cell_csv, output, chunksize=1, workers=workers)
+
+    scored = pd.read_parquet(output)
+    assert rows == len(scored) == 10
+    assert scored['Glucose'].dtype == np.float64
+    assert scored['probability'].isna().tolist() == [i == 2 for i in range(10)]
+
+
+def test_csv_chunk_with_bad_cell(bad_cell_csv, tmp_path):
+    output = str(tmp_path / 'scored.csv')
+    score_csv.score_csv('diabetes', bad_cell_csv, output, chunksize=1)
+
+    scored = pd.read_csv(output)
+    assert scored['Glucose'].astype(str).tolist()[2] == 'abc'
+    assert scored['probability'].isna().tolist() == [i == 2 for i in range(10)]
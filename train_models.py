@@ -0,0 +1,191 @@
+"""Train the three disease models from the bundled CSVs.
+
+Each model is a StandardScaler followed by the estimator the app has always
+served (linear SVC for diabetes, logistic regression for heart disease, RBF
+SVC for Parkinson's). The hyperparameters are picked by a stratified,
+shuffled grid search that runs its folds in parallel. The scaler fitted for
+a fold is cached on disk (`Pipeline(memory=...)`), so it is fitted once per
+fold rather than once per grid point. Seeds are fixed, so the same data and
+the same library versions give the same artifacts.
+
+    python train_models.py                      # all three, into saved models/trained/
+    python train_models.py heart --n-jobs 4
+    python train_models.py --publish            # also publish to the registry and recalibrate
+
+Artifacts use the `{'model': estimator, 'scaler': StandardScaler}` bundle
+format of the shipped `.sav` files. `training_report.json` in the output
+directory records the chosen parameters, cross-validated metrics, timings,
+the SHA-256 of every artifact and the library versions used.
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import compiled_model
+import scoring
+
+working_dir = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.environ.get('HEALTH_TRAINING_DIR', os.path.join(working_dir, 'saved models', 'trained'))
+CV_FOLDS = 5
+RANDOM_STATE = 0
+# Probabilities come from calibration.py, so only score- and label-based metrics here
+SCORING = ['roc_auc', 'accuracy', 'recall', 'f1']
+# The search picks the candidate with the best value of this metric
+REFIT_METRIC = 'roc_auc'
+
+
+def _estimator(disease):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.svm import SVC
+
+    # Only estimator types compiled_model.py can compile
+    if disease == 'diabetes':
+        return SVC(kernel='linear', class_weight='balanced'), {'C': [0.01, 0.1, 1.0, 10.0]}
+    if disease == 'heart':
+        return LogisticRegression(max_iter=1000), {'C': [0.01, 0.1, 1.0, 10.0]}
+    if disease == 'parkinsons':
+        return SVC(kernel='rbf', class_weight='balanced'), \
+            {'C': [0.1, 1.0, 10.0, 100.0], 'gamma': ['scale', 0.01, 0.03, 0.1]}
+    raise KeyError(disease)
+
+
+def _versions():
+    import joblib
+    import sklearn
+
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'scikit-learn': sklearn.__version__, 'joblib': joblib.__version__}
+
+
+def train(disease, n_jobs=-1, cache_dir=None):
+    """Grid-search and fit one model; returns (bundle, report dict)."""
+    from sklearn.model_selection import GridSearchCV, StratifiedKFold
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    spec = scoring.get_spec(disease)
+    timings = {}
+    start = time.perf_counter()
+    data = scoring.load_dataset(disease)
+    # The scaler is fitted on a DataFrame so it keeps feature_names_in_, which scoring relies on
+    features = data[spec['features']].astype(np.float64)
+    labels = data[spec['target']].to_numpy(dtype=np.int64)
+    timings['load'] = time.perf_counter() - start
+
+    estimator, grid = _estimator(disease)
+    pipeline = Pipeline([('scaler', StandardScaler()), ('model', estimator)], memory=cache_dir)
+    search = GridSearchCV(
+        pipeline,
+        {f'model__{name}': values for name, values in grid.items()},
+        scoring=SCORING,
+        refit=REFIT_METRIC,
+        cv=StratifiedKFold(CV_FOLDS, shuffle=True, random_state=RANDOM_STATE),
+        n_jobs=n_jobs,
+    )
+    start = time.perf_counter()
+    search.fit(features, labels)
+    timings['search'] = time.perf_counter() - start
+    timings['refit'] = search.refit_time_
+
+    best = search.best_index_
+    cv_metrics = {}
+    for metric in SCORING:
+        cv_metrics[metric] = {'mean': round(float(search.cv_results_[f'mean_test_{metric}'][best]), 4),
+                              'std': round(float(search.cv_results_[f'std_test_{metric}'][best]), 4)}
+
+    fitted = search.best_estimator_
+    bundle = {'model': fitted.named_steps['model'], 'scaler': fitted.named_steps['scaler']}
+    report = {
+        'rows': int(len(labels)),
+        'positives': int(labels.sum()),
+        'estimator': type(estimator).__name__,
+        'params': {name.split('__', 1)[1]: value for name, value in search.best_params_.items()},
+        'candidates': len(search.cv_results_['params']),
+        'cv_folds': CV_FOLDS,
+        'cv_metrics': cv_metrics,
+        'timings': {stage: round(seconds, 3) for stage, seconds in timings.items()},
+    }
+    return bundle, report
+
+
+def save_bundle(bundle, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    compiled_model.atomic_write(path, pickle.dumps(bundle, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def publish(disease, path, notes):
+    """Publish an artifact to the registry, calibrate it, then activate it.
+
+    The version is activated only once its calibration is saved, so the
+    reloader never picks up the new model without one.
+    """
+    import calibration
+    import model_registry
+
+    version = model_registry.publish(disease, path, activate_now=False, notes=notes)
+    artifact_path = os.path.join(model_registry.version_dir(disease, version), model_registry.ARTIFACT_NAME)
+    calibrator, report = calibration.fit(disease, model=scoring.load_pickled(disease, artifact_path),
+                                         model_sha256=model_registry.read_manifest(disease, version)['sha256'])
+    calibration.save(disease, calibrator, report)
+    model_registry.activate(disease, version)
+    scoring.unload_model(disease)
+    return version
+
+
+def main(argv=None):
+    from compiled_model import file_sha256
+
+    parser = argparse.ArgumentParser(description="Train the disease models from the bundled CSVs.")
+    parser.add_argument('diseases', nargs='*', metavar='disease',
+                        help=f"diseases to train: {', '.join(scoring.DISEASES)} (default: all)")
+    parser.add_argument('--output', default=OUTPUT_DIR, help="directory for the artifacts and the report")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="parallel CV fits (-1 = one per CPU core)")
+    parser.add_argument('--no-cache', action='store_true', help="don't cache fitted scalers between fits")
+    parser.add_argument('--publish', action='store_true',
+                        help="publish and activate each artifact in the model registry, then recalibrate")
+    args = parser.parse_args(argv)
+    for disease in args.diseases:
+        if disease not in scoring.DISEASES:
+            parser.error(f"unknown disease {disease!r}")
+
+    cache_dir = None if args.no_cache else os.path.join(args.output, '.cache')
+    started = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    total = time.perf_counter()
+    models = {}
+    for disease in args.diseases or scoring.DISEASES:
+        bundle, report = train(disease, n_jobs=args.n_jobs, cache_dir=cache_dir)
+        path = os.path.join(args.output, scoring.get_spec(disease)['model_file'])
+        save_bundle(bundle, path)
+        report['artifact'] = os.path.basename(path)
+        report['sha256'] = file_sha256(path)
+        if args.publish:
+            params = ', '.join(f'{k}={v}' for k, v in report['params'].items())
+            report['published'] = publish(disease, path, notes=f"train_models.py ({params})")
+        models[disease] = report
+        auc, accuracy = report['cv_metrics']['roc_auc'], report['cv_metrics']['accuracy']
+        print(f"{disease}: {report['estimator']} {report['params']}  "
+              f"ROC AUC {auc['mean']:.3f} ± {auc['std']:.3f}  accuracy {accuracy['mean']:.3f}  "
+              f"({report['timings']['search']:.1f}s)" + (f"  -> {report['published']}" if args.publish else ''))
+
+    summary = {
+        'started': started,
+        'seconds': round(time.perf_counter() - total, 3),
+        'n_jobs': args.n_jobs,
+        'random_state': RANDOM_STATE,
+        'versions': _versions(),
+        'models': models,
+    }
+    with open(os.path.join(args.output, 'training_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+        f.write('\n')
+    print(f"Trained {len(models)} model(s) in {summary['seconds']:.1f}s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()